@@ -0,0 +1,58 @@
+"""
+Measure the bytes received per endpoint in one refresh cycle of every account
+(overview, holdings with share counts, valuations and transactions), with and
+without compression.
+
+    python benchmarks/bandwidth.py --accounts 5 --holdings 50
+"""
+import argparse
+
+from platform_stub import PlatformStub
+
+from easy_equities_client.clients import EasyEquitiesClient
+from easy_equities_client.utils.bandwidth import ACCEPT_ENCODING
+
+
+def refresh_cycle(client: EasyEquitiesClient) -> None:
+    for account in client.accounts.list():
+        client.accounts.holdings(account.id, include_shares=True)
+        client.accounts.valuations(account.id)
+
+
+def report(title: str, client: EasyEquitiesClient) -> None:
+    print(title)
+    usage = client.bandwidth.reset()
+    for endpoint, endpoint_usage in sorted(usage.items()):
+        print(
+            f"  {endpoint[:44]:44} {endpoint_usage.requests:5} requests "
+            f"{endpoint_usage.wire_bytes / 1024:9.1f} KiB on the wire "
+            f"{endpoint_usage.decoded_bytes / 1024:9.1f} KiB decoded"
+        )
+    wire = sum(u.wire_bytes for u in usage.values())
+    decoded = sum(u.decoded_bytes for u in usage.values())
+    print(
+        f"  {'total':44} {'':14} {wire / 1024:9.1f} KiB on the wire "
+        f"{decoded / 1024:9.1f} KiB decoded"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandwidth per refresh cycle")
+    parser.add_argument("--accounts", type=int, default=5)
+    parser.add_argument("--holdings", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"Accept-Encoding: {ACCEPT_ENCODING}")
+    for compress in (False, True):
+        with PlatformStub(args.accounts, args.holdings, compress=compress) as stub:
+            client = EasyEquitiesClient(base_url=stub.url)
+            client.login("user", "password")
+            # The first cycle fills the holding detail cache.
+            refresh_cycle(client)
+            report(f"First cycle, compress={compress}", client)
+            refresh_cycle(client)
+            report(f"Next cycle, compress={compress}", client)
+
+
+if __name__ == "__main__":
+    main()
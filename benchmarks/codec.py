@@ -0,0 +1,105 @@
+"""
+Compare encoding client results with easy_equities_client.utils.codec against
+json (with list_of_dataclasses_to_dicts for accounts), for speed and size.
+
+    python benchmarks/codec.py --holdings 200 --transactions 2000 --repeat 200
+"""
+import argparse
+import json
+import timeit
+
+from platform_stub import holdings_page, transactions
+
+from easy_equities_client.accounts.parsers import AccountHoldingsParser
+from easy_equities_client.accounts.types import Account
+from easy_equities_client.utils import codec
+from easy_equities_client.utils.dataclasses import list_of_dataclasses_to_dicts
+
+
+def valuation(items: int) -> dict:
+    def label_values(prefix: str) -> list:
+        return [
+            {"Label": f"{prefix} {i}", "Value": f"R{i * 3.5:.2f}"} for i in range(items)
+        ]
+
+    return {
+        "NetInterestOnCashItems": label_values("Interest"),
+        "AccrualSummaryItems": label_values("Accrual"),
+        "TopSummary": {
+            "AccountValue": 123456.78,
+            "AccountCurrency": "ZAR",
+            "PeriodMovements": [{"Label": "Deposits", "Value": "R1 000.00"}],
+        },
+        "InvestmentTypesAndManagers": {"Types": label_values("Type"), "Managers": []},
+        "InvestmentSummaryItems": label_values("Investment"),
+        "CostsSummaryItems": label_values("Cost"),
+        "FundSummaryItems": [],
+        "AccrualIncomeSummaryItems": None,
+        "AccrualExpenseSummaryItems": None,
+    }
+
+
+def json_dumps(value) -> bytes:
+    if value and isinstance(value, list) and isinstance(value[0], Account):
+        value = list_of_dataclasses_to_dicts(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def json_loads(data: bytes, value):
+    result = json.loads(data)
+    if value and isinstance(value, list) and isinstance(value[0], Account):
+        result = [Account(**account) for account in result]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Client result encoding benchmark")
+    parser.add_argument("--holdings", type=int, default=200)
+    parser.add_argument("--transactions", type=int, default=2000)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    values = {
+        "accounts": [
+            Account(str(i), f"Account {i}", "2") for i in range(args.accounts)
+        ],
+        "holdings": AccountHoldingsParser(
+            holdings_page(args.holdings)
+        ).extract_holdings(),
+        "transactions": transactions(args.transactions, days=args.transactions),
+        "valuation": valuation(20),
+    }
+    print(f"{'':14} {'':6} {'size':>10} {'encode':>12} {'decode':>12}")
+    for name, value in values.items():
+        data = codec.dumps(value)
+        assert codec.loads(data) == value, name
+        json_data = json_dumps(value)
+        assert json_loads(json_data, value) == value, name
+        for label, dumps, loads, encoded in [
+            ("json", json_dumps, lambda d, value=value: json_loads(d, value), json_data),
+            ("codec", codec.dumps, codec.loads, data),
+        ]:
+            encode = min(
+                timeit.repeat(
+                    lambda dumps=dumps, value=value: dumps(value),
+                    number=args.repeat,
+                    repeat=3,
+                )
+            )
+            decode = min(
+                timeit.repeat(
+                    lambda loads=loads, encoded=encoded: loads(encoded),
+                    number=args.repeat,
+                    repeat=3,
+                )
+            )
+            print(
+                f"{name:14} {label:6} {len(encoded):10,d} "
+                f"{encode / args.repeat * 1e6:9.1f} us "
+                f"{decode / args.repeat * 1e6:9.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare extracting share counts from a holding detail page with HoldingDetailParser
+against the previous approach of two ``soup.find(lambda ...)`` scans over a fully
+parsed page.
+
+    python benchmarks/detail_parser.py --filler 300 --repeat 50
+"""
+import argparse
+import timeit
+
+from bs4 import BeautifulSoup
+from platform_stub import detail_page
+
+from easy_equities_client.accounts.detail_parsers import HoldingDetailParser
+
+
+def lambda_scan(page: bytes) -> str:
+    soup = BeautifulSoup(page, "html.parser")
+    whole_shares = soup.find(
+        lambda tag: '#Shares' in tag
+    ).next_sibling.next_sibling.text.strip()
+    partial_shares = soup.find(
+        lambda tag: '#FSR' in tag
+    ).next_sibling.next_sibling.text.strip()
+    return f"{whole_shares}{partial_shares}"
+
+
+def detail_parser(page: bytes) -> str:
+    return HoldingDetailParser(page).extract_detail()['shares']
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Holding detail page parsing benchmark"
+    )
+    parser.add_argument(
+        "--filler", type=int, default=300, help="Unrelated rows per half page"
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    page = detail_page(41, filler=args.filler)
+    assert lambda_scan(page) == detail_parser(page)
+    print(f"page size: {len(page) / 1024:.0f} KiB")
+    for name, function in [
+        ("soup.find lambda scans", lambda_scan),
+        ("HoldingDetailParser", detail_parser),
+    ]:
+        seconds = min(
+            timeit.repeat(
+                lambda function=function: function(page), number=args.repeat, repeat=3
+            )
+        )
+        print(f"{name:24} {seconds / args.repeat * 1000:8.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
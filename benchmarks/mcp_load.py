@@ -0,0 +1,246 @@
+"""
+Load test the MCP server against the stand-in platform: start `platform_stub.py`,
+run `mcp_server/mcp_server.py` against it and call list_accounts,
+get_account_holdings, get_instrument_historical_prices and get_account_summary
+from N concurrent clients for a while. Reports throughput, p50/p99 latency per
+tool, platform requests per call and the server's peak memory.
+
+    python benchmarks/mcp_load.py --clients 16 --duration 10 --latency 0.05
+    python benchmarks/mcp_load.py --transport streamable-http --sessions 1 --cache-ttl 0
+
+With the stdio transport the clients share one session to one server process,
+like tools called in parallel by one agent. With streamable-http every client has
+its own session. The server caches results (see EASYEQUITIES_MCP_CACHE_TTL), so
+pass ``--cache-ttl 0`` to measure calls that reach the platform.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Dict, List
+
+from platform_stub import PlatformStub, contract_code
+
+from mcp import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SERVER = os.path.join(ROOT, "mcp_server", "mcp_server.py")
+TOOLS = [
+    "list_accounts",
+    "get_account_holdings",
+    "get_instrument_historical_prices",
+    "get_account_summary",
+]
+
+
+def server_env(args, stub: PlatformStub) -> Dict[str, str]:
+    env = {
+        **os.environ,
+        "EASYEQUITIES_BASE_URL": stub.url,
+        "EASYEQUITIES_USERNAME": "load-test",
+        "EASYEQUITIES_PASSWORD": "load-test",
+        "EASYEQUITIES_MCP_TRANSPORT": args.transport,
+        "EASYEQUITIES_MCP_HOST": "127.0.0.1",
+        "EASYEQUITIES_MCP_PORT": str(args.port),
+    }
+    # Unless given, the server's own defaults apply.
+    if args.sessions is not None:
+        env["EASYEQUITIES_MCP_SESSIONS"] = str(args.sessions)
+    if args.cache_ttl is not None:
+        env["EASYEQUITIES_MCP_CACHE_TTL"] = str(args.cache_ttl)
+    return env
+
+
+@asynccontextmanager
+async def stdio_sessions(args, stub: PlatformStub):
+    parameters = StdioServerParameters(
+        command=sys.executable, args=[SERVER], env=server_env(args, stub), cwd=ROOT
+    )
+    with open(os.devnull, "w") as devnull:
+        async with stdio_client(parameters, errlog=devnull) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield [session] * args.clients
+
+
+@asynccontextmanager
+async def http_sessions(args, stub: PlatformStub):
+    server = subprocess.Popen(
+        [sys.executable, SERVER],
+        env=server_env(args, stub),
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{args.port}/mcp"
+    try:
+        # Wait for the server to listen.
+        started = time.monotonic()
+        while True:
+            try:
+                async with streamablehttp_client(url) as (read, write, _):
+                    async with ClientSession(read, write) as session:
+                        await session.initialize()
+                break
+            except Exception:
+                if server.poll() is not None or time.monotonic() - started > 30:
+                    raise RuntimeError("The MCP server didn't start") from None
+                await asyncio.sleep(0.2)
+        async with AsyncExitStack() as stack:
+            sessions = []
+            for _ in range(args.clients):
+                read, write, _ = await stack.enter_async_context(
+                    streamablehttp_client(url)
+                )
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+                sessions.append(session)
+            yield sessions
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def arguments(tool: str, rng: random.Random, args) -> dict:
+    if tool == "get_account_holdings":
+        return {"account_id": str(rng.randrange(args.accounts))}
+    if tool == "get_instrument_historical_prices":
+        return {"contract_code": contract_code(rng.randrange(args.holdings))}
+    return {}
+
+
+def failed(result) -> bool:
+    if result.isError:
+        return True
+    for content in result.content:
+        text = getattr(content, "text", "")
+        if text.startswith("{") and '"error"' in text:
+            try:
+                return "error" in json.loads(text)
+            except ValueError:
+                pass
+    return False
+
+
+async def client(
+    session: ClientSession,
+    index: int,
+    args,
+    stop_at: float,
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+) -> None:
+    rng = random.Random(index)
+    tools = args.tools
+    while time.monotonic() < stop_at:
+        tool = tools[rng.randrange(len(tools))]
+        start = time.perf_counter()
+        try:
+            result = await session.call_tool(tool, arguments(tool, rng, args))
+            error = failed(result)
+        except Exception:
+            error = True
+        latencies[tool].append(time.perf_counter() - start)
+        errors[tool] += error
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def report(latencies, errors, elapsed: float, platform_requests: int) -> None:
+    calls = sum(len(values) for values in latencies.values())
+    print(f"{'tool':34} {'calls':>7} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for tool, values in sorted(latencies.items()):
+        print(
+            f"{tool:34} {len(values):7} {errors[tool]:7} "
+            f"{percentile(values, 0.5) * 1000:8.1f} "
+            f"{percentile(values, 0.99) * 1000:8.1f}"
+        )
+    everything = [value for values in latencies.values() for value in values]
+    if everything:
+        print(
+            f"{'all':34} {calls:7} {sum(errors.values()):7} "
+            f"{percentile(everything, 0.5) * 1000:8.1f} "
+            f"{percentile(everything, 0.99) * 1000:8.1f}"
+        )
+    print(f"throughput: {calls / elapsed:.1f} calls/s over {elapsed:.1f} s")
+    print(
+        f"platform requests: {platform_requests} "
+        f"({platform_requests / (calls or 1):.2f} per call)"
+    )
+
+
+def max_rss_mib(who: int) -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    maxrss = resource.getrusage(who).ru_maxrss
+    return maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+async def run(args) -> None:
+    sessions_for = stdio_sessions if args.transport == "stdio" else http_sessions
+    with PlatformStub(args.accounts, args.holdings, args.latency) as stub:
+        async with sessions_for(args, stub) as sessions:
+            # Log in and list the accounts before measuring.
+            await sessions[0].call_tool("list_accounts", {})
+            warmup_requests = stub.requests
+            latencies: Dict[str, List[float]] = defaultdict(list)
+            errors: Dict[str, int] = defaultdict(int)
+            start = time.monotonic()
+            stop_at = start + args.duration
+            await asyncio.gather(
+                *[
+                    client(session, index, args, stop_at, latencies, errors)
+                    for index, session in enumerate(sessions)
+                ]
+            )
+            elapsed = time.monotonic() - start
+            platform_requests = stub.requests - warmup_requests
+    print(
+        f"{args.clients} clients over {args.transport}, "
+        f"{args.sessions or 'default'} platform sessions, "
+        f"{args.accounts} accounts x {args.holdings} holdings, "
+        f"{args.latency * 1000:.0f} ms platform latency"
+    )
+    report(latencies, errors, elapsed, platform_requests)
+    print(f"server peak memory: {max_rss_mib(resource.RUSAGE_CHILDREN):.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP server load test")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--accounts", type=int, default=3)
+    parser.add_argument("--holdings", type=int, default=30)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Seconds per request"
+    )
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        default=None,
+        help="EASYEQUITIES_MCP_SESSIONS, defaults to the server's default",
+    )
+    parser.add_argument(
+        "--cache-ttl", type=float, default=None, help="EASYEQUITIES_MCP_CACHE_TTL"
+    )
+    parser.add_argument(
+        "--transport", choices=["stdio", "streamable-http"], default="stdio"
+    )
+    parser.add_argument("--port", type=int, default=8765, help="streamable-http port")
+    parser.add_argument("--tools", nargs="+", choices=TOOLS, default=TOOLS)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare parsing archived holdings and detail pages in the calling process with
+parsing them in a ParsePool of worker processes.
+
+    python benchmarks/parse_pool.py --pages 40 --holdings 50 --workers 4
+"""
+import argparse
+import time
+
+from platform_stub import detail_page, holdings_page
+
+from easy_equities_client.accounts.detail_parsers import HoldingDetailParser
+from easy_equities_client.accounts.parse_pool import ParsePool
+from easy_equities_client.accounts.parsers import AccountHoldingsParser
+
+
+def timed(name: str, function) -> list:
+    start = time.perf_counter()
+    result = list(function())
+    print(f"{name:36} {time.perf_counter() - start:8.2f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process pool parsing benchmark")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--holdings", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    holdings_pages = [holdings_page(args.holdings)] * args.pages
+    detail_pages = [detail_page(i) for i in range(args.pages * 5)]
+
+    serial = timed(
+        "holdings pages, in process",
+        lambda: (AccountHoldingsParser(page).extract_holdings() for page in holdings_pages),
+    )
+    with ParsePool(max_workers=args.workers) as pool:
+        # Start the workers before timing.
+        list(pool.map_details(detail_pages[:1]))
+        pooled = timed("holdings pages, ParsePool", lambda: pool.map_holdings(holdings_pages))
+        timed(
+            "detail pages, in process",
+            lambda: (HoldingDetailParser(page).extract_detail() for page in detail_pages),
+        )
+        timed("detail pages, ParsePool", lambda: pool.map_details(detail_pages, chunksize=4))
+    assert [sorted(h['name'] for h in page) for page in serial] == [
+        sorted(h['name'] for h in page) for page in pooled
+    ]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+A local stand-in for the platform endpoints in `easy_equities_client.constants`,
+serving synthetic accounts, holdings, detail pages, transactions and prices.
+
+Point a client at it with ``EasyEquitiesClient(base_url=stub.url)`` or by setting
+``EASYEQUITIES_BASE_URL`` for the CLI and MCP server. Run it on its own with::
+
+    python benchmarks/platform_stub.py --accounts 3 --holdings 50 --latency 0.05
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# Add the project root to Python path BEFORE importing easy_equities_client
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from easy_equities_client import constants  # noqa: E402
+
+DETAIL_PATH = "/AccountOverview/GetInstrumentDetailAction/"
+
+
+def contract_code(index: int) -> str:
+    return f"EQU.ZA.STUB{index:04d}"
+
+
+def isin(index: int) -> str:
+    return f"ZAE{index:09d}"
+
+
+def overview_page(accounts: int) -> bytes:
+    divs = "".join(
+        f'<div data-id="{i}" data-tradingcurrencyid="2">'
+        f'<div id="trust-account-types">Account {i}</div></div>'
+        for i in range(accounts)
+    )
+    return f"<html><body><h1>My Investments</h1>{divs}</body></html>".encode()
+
+
+def holding_row(index: int) -> str:
+    return (
+        '<div class="holding-body-table-row">'
+        '<div class="display-flex-justify-content-space-between-align-items-center '
+        'holding-inner-container">'
+        '<div class="equity-image-as-text"><div class="auto-ellipsis">'
+        f'<div>Instrument {index}</div></div></div>'
+        '<img class="instrument" '
+        f'src="https://resources.easyequities.co.za/logos/{contract_code(index)}.png"/>'
+        f'<div class="purchase-value-cell"><span>R{index + 1} 000.00</span></div>'
+        f'<div class="current-value-cell"><span>R{index + 1} 100.00</span></div>'
+        f'<div class="current-price-cell"><span>R{index + 10}.00</span></div>'
+        '<div class="collapse-container">'
+        f'<span data-detailviewurl="{DETAIL_PATH}?IsinCode={isin(index)}"></span>'
+        '</div></div></div>'
+    )
+
+
+def holdings_page(holdings: int) -> bytes:
+    rows = "".join(holding_row(i) for i in range(holdings))
+    return (
+        '<html><body><div class="holding-table-body">'
+        f"{rows}</div></body></html>"
+    ).encode()
+
+
+def detail_page(index: int, filler: int = 300) -> bytes:
+    # Detail pages are large; most of the document is unrelated markup.
+    rows = '<div class="row"><div class="col"><p>Information</p></div></div>' * filler
+    return (
+        f"<html><body>{rows}"
+        f'<div class="shares"><label>#Shares</label>\n<span> {index + 1} </span></div>'
+        '<div class="shares"><label>#FSR</label>\n<span>.1234</span></div>'
+        f"{rows}</body></html>"
+    ).encode()
+
+
+def transactions(holdings: int, days: int = 365) -> list:
+    return [
+        {
+            "TransactionId": i,
+            "DebitCredit": -100.0,
+            "Comment": f"Bought {i % 7 + 1} {contract_code(i % holdings)} @ 10.00",
+            "TransactionDate": time.strftime(
+                "%Y-%m-%dT00:00:00", time.gmtime(time.time() - (days - i) * 86400)
+            ),
+            "LogId": i,
+            "ActionId": 1,
+            "Action": "Buy",
+            "ContractCode": contract_code(i % holdings),
+        }
+        for i in range(min(days, holdings * 4))
+    ]
+
+
+def chart_data(code: str, points: int = 22) -> dict:
+    seed = sum(map(ord, code))
+    dataset = [10 + ((seed + i * 7) % 13) / 10 for i in range(points)]
+    labels = [
+        time.strftime("%d %b %y", time.gmtime(time.time() - (points - i) * 86400))
+        for i in range(points)
+    ]
+    return {
+        "success": True,
+        "chartData": {
+            "Dataset": dataset,
+            "Labels": labels,
+            "DailyChange": dataset[-1] - dataset[-2],
+            "PeriodReturn": dataset[-1] / dataset[0] - 1,
+            "YMax": max(dataset),
+            "YMin": min(dataset),
+            "DailyChangeMonetaryValue": dataset[-1] - dataset[-2],
+            "TradingCurrencySymbol": "R",
+            "HasData": True,
+        },
+    }
+
+
+class PlatformStub:
+    """
+    Serve the stand-in platform on a background thread.
+    """
+
+    def __init__(
+        self,
+        accounts: int = 2,
+        holdings: int = 20,
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        compress: bool = True,
+    ):
+        """
+        :param compress: Gzip responses for clients that accept it, like the platform.
+        """
+        self.accounts = accounts
+        self.holdings = holdings
+        self.latency = latency
+        self.compress = compress
+        self.requests = 0
+        self._overview = overview_page(accounts)
+        self._holdings = holdings_page(holdings)
+        self._transactions = json.dumps(transactions(holdings)).encode()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, body: bytes, status: int = 200, content_type="text/html"):
+                self.send_response(status)
+                if status == 302:
+                    self.send_header("Location", "/")
+                if stub.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=6)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, value):
+                self._send(json.dumps(value).encode(), content_type="application/json")
+
+            def do_POST(self):
+                stub.requests += 1
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                time.sleep(stub.latency)
+                if self.path == constants.PLATFORM_SIGN_IN_PATH:
+                    self._send(b"", status=302)
+                else:
+                    self._send(b"")
+
+            def do_GET(self):
+                stub.requests += 1
+                time.sleep(stub.latency)
+                url = urllib.parse.urlsplit(self.path)
+                query = urllib.parse.parse_qs(url.query)
+                if self.path == constants.PLATFORM_ACCOUNT_OVERVIEW_PATH:
+                    self._send(stub._overview)
+                elif self.path == constants.PLATFORM_HOLDINGS_PATH:
+                    self._send(stub._holdings)
+                elif self.path == constants.PLATFORM_ACCOUNT_VALUATIONS_PATH:
+                    # The platform double encodes valuations.
+                    self._json(json.dumps({"TopSummary": {"AccountValue": 1000.0}}))
+                elif self.path == constants.PLATFORM_TRANSACTIONS_PATH:
+                    self._send(stub._transactions, content_type="application/json")
+                elif url.path == constants.PLATFORM_GET_CHART_DATA_PATH:
+                    self._json(chart_data(query.get("code", [""])[0]))
+                elif url.path == DETAIL_PATH:
+                    self._send(detail_page(int(query["IsinCode"][0][3:])))
+                else:
+                    self._send(b"Not found", status=404)
+
+        return Handler
+
+    def start(self) -> "PlatformStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "PlatformStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=2)
+    parser.add_argument("--holdings", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per request")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--no-compress", action="store_true", help="Don't gzip responses"
+    )
+    args = parser.parse_args()
+    stub = PlatformStub(
+        args.accounts,
+        args.holdings,
+        args.latency,
+        port=args.port,
+        compress=not args.no_compress,
+    )
+    print(f"Serving stand-in platform on {stub.url}")
+    stub._server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Measure the startup cost of the CLI: the import time reported by
+``python -X importtime`` and the time until each subcommand has printed its result,
+running against the local stand-in platform. Every subcommand is also run with the
+CLI and package of a baseline revision (by default the repository's first commit)
+to compare before and after.
+
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --baseline v0.5.0
+"""
+import argparse
+import io
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from platform_stub import PlatformStub, contract_code
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CLI = os.path.join("examples", "easy_equities_cli.py")
+
+SUBCOMMANDS = [
+    ["accounts", "list"],
+    ["accounts", "valuations", "-a", "0"],
+    ["accounts", "transactions", "-a", "0"],
+    ["accounts", "holdings", "-a", "0"],
+    ["accounts", "holdings", "-a", "0", "-s"],
+    ["accounts", "profit-loss"],
+    ["instruments", "prices", contract_code(0)],
+]
+
+# Reported if imported at any depth, e.g. bs4 imported by the page parsers.
+HEAVY_MODULES = ("bs4", "dotenv", "colorama")
+
+IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+# The baseline CLI may not read EASYEQUITIES_BASE_URL, so point its client's default
+# URL at the stand-in platform before the CLI imports the client.
+SITECUSTOMIZE = """\
+import os
+
+from easy_equities_client import constants
+
+constants.EASY_EQUITIES_BASE_PLATFORM_URL = os.environ["EASYEQUITIES_BASE_URL"]
+"""
+
+
+def import_times(stderr: str) -> Tuple[int, Set[str]]:
+    """
+    Return the total import time in microseconds, the sum of the cumulative times
+    of the top-level imports, and the names of all the modules imported at any depth.
+    """
+    total = 0
+    modules = set()
+    for _self_us, cumulative_us, indent, module in IMPORT_TIME.findall(stderr):
+        if not indent:
+            total += int(cumulative_us)
+        modules.add(module)
+    return total, modules
+
+
+def heavy_modules(modules: Set[str]) -> Set[str]:
+    return {
+        heavy
+        for heavy in HEAVY_MODULES
+        for module in modules
+        if module == heavy or module.startswith(heavy + ".")
+    }
+
+
+def export(revision: str, directory: str) -> None:
+    """
+    Extract the tree of a git revision into a directory.
+    """
+    archive = subprocess.run(
+        ["git", "archive", revision], cwd=ROOT, capture_output=True, check=True
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+
+
+def run(root: str, args: List[str], env: Dict[str, str]) -> Tuple[float, int, Set[str]]:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.join(root, CLI), *args],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+    return (elapsed, *import_times(result.stderr))
+
+
+def measure(
+    root: str, subcommand: List[str], env: Dict[str, str], runs: int
+) -> Optional[Tuple[float, float, Set[str]]]:
+    """
+    Return the median import and wall times in milliseconds of a subcommand and the
+    heavy modules it imported, or None if the subcommand failed.
+    """
+    walls, imports = [], []
+    loaded: Set[str] = set()
+    for _ in range(runs):
+        try:
+            wall, total, modules = run(root, subcommand, env)
+        except subprocess.CalledProcessError:
+            return None
+        walls.append(wall * 1000)
+        imports.append(total / 1000)
+        loaded |= heavy_modules(modules)
+    return statistics.median(imports), statistics.median(walls), loaded
+
+
+def describe(result: Optional[Tuple[float, float, Set[str]]]) -> str:
+    if result is None:
+        return f"{'failed':>9} {'':>9}  {'':20}"
+    imports, wall, loaded = result
+    return f"{imports:9.1f} {wall:9.1f}  {', '.join(sorted(loaded)) or '-':20}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--holdings", type=int, default=20)
+    parser.add_argument(
+        "--baseline",
+        help="Git revision to compare with, defaults to the first commit",
+    )
+    args = parser.parse_args()
+    baseline = args.baseline or subprocess.run(
+        ["git", "rev-list", "--max-parents=0", "HEAD"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()[0]
+
+    with PlatformStub(holdings=args.holdings) as stub, tempfile.TemporaryDirectory(
+        prefix="startup-baseline-"
+    ) as baseline_root:
+        export(baseline, baseline_root)
+        customize = os.path.join(baseline_root, "_startup_benchmark")
+        os.mkdir(customize)
+        with open(os.path.join(customize, "sitecustomize.py"), "w") as f:
+            f.write(SITECUSTOMIZE)
+        env = dict(
+            os.environ,
+            EASYEQUITIES_BASE_URL=stub.url,
+            EASYEQUITIES_USERNAME="benchmark",
+            EASYEQUITIES_PASSWORD="benchmark",
+        )
+        baseline_path = os.pathsep.join([customize, baseline_root])
+        trees = [
+            (baseline_root, dict(env, PYTHONPATH=baseline_path)),
+            (ROOT, dict(env, PYTHONPATH=ROOT)),
+        ]
+        print(f"baseline: {baseline[:12]}, times in ms")
+        columns = f"{'imports':>9} {'result':>9}  {'heavy modules':20}"
+        print(f"{'subcommand':36} {'before':^41} {'after':^41}")
+        print(f"{'':36} {columns} {columns}")
+        for subcommand in SUBCOMMANDS:
+            before, after = [
+                measure(root, subcommand, tree_env, args.runs)
+                for root, tree_env in trees
+            ]
+            print(f"{' '.join(subcommand):36} {describe(before)} {describe(after)}")
+
+
+if __name__ == "__main__":
+    main()
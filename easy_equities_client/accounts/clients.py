@@ -1,44 +1,147 @@
 import json
-from typing import List, Optional
+import logging
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple, Union
 
-from bs4 import BeautifulSoup
-from requests import Session
+from requests import Response, Session
 
 from easy_equities_client import constants
-from easy_equities_client.accounts.parsers import (
-    AccountHoldingsParser,
-    AccountOverviewParser,
+from easy_equities_client.accounts.detail_cache import HoldingDetailCache
+from easy_equities_client.accounts.types import (
+    HOLDING_DETAIL_FIELDS,
+    HOLDING_PAGE_FIELDS,
+    Account,
+    Holding,
+    HoldingDetail,
+    Transaction,
+    Valuation,
 )
-from easy_equities_client.accounts.types import Account, Holding, Transaction, Valuation
+from easy_equities_client.instruments.index import InstrumentIndex
 from easy_equities_client.types import Client
+from easy_equities_client.utils.bandwidth import BandwidthMeter
+from easy_equities_client.utils.caching import ResponseCache
+from easy_equities_client.utils.resilience import CircuitBreakers, Deadline
+
+if TYPE_CHECKING:
+    from easy_equities_client.accounts.parse_pool import ParsePool
+
+logger = logging.getLogger(__name__)
+
+
+def _set_detail_fields(
+    holding: Holding, detail: HoldingDetail, fields: List[str]
+) -> None:
+    for field in fields:
+        if field in detail:
+            holding[field] = detail[field]  # type: ignore
+
+
+def _error_marker(error: BaseException) -> str:
+    if isinstance(error, FutureTimeoutError):
+        return "Deadline exceeded"
+    return str(error) or type(error).__name__
+
+
+def _partial_result(
+    holding: Holding, error: Exception, deadline: Optional[Deadline]
+) -> None:
+    """
+    Mark a holding whose details failed with an "error" field when the call has a
+    deadline, or raise the error otherwise.
+    """
+    if deadline is None:
+        raise error
+    holding['error'] = _error_marker(error)
 
 
 class AccountsClient(Client):
-    def __init__(self, base_url: str = "", session: Session = None):
-        super().__init__(base_url, session)
+    def __init__(
+        self,
+        base_url: str = "",
+        session: Session = None,
+        instrument_index: InstrumentIndex = None,
+        detail_cache: HoldingDetailCache = None,
+        parse_pool: "ParsePool" = None,
+        circuit_breakers: CircuitBreakers = None,
+        bandwidth: BandwidthMeter = None,
+    ):
+        super().__init__(base_url, session, circuit_breakers, bandwidth)
+        self.instrument_index = instrument_index
+        self.detail_cache = detail_cache
+        # Parse pages in worker processes instead of the calling thread.
+        self.parse_pool = parse_pool
         self.current_account: Optional[str] = None
+        # The selected account is server-side session state, so switching accounts and
+        # fetching from it must happen atomically when the client is shared by threads.
+        self._lock = threading.RLock()
+        # Parsed pages per (path, account ID[, holding fields]), reused while a page is
+        # unchanged.
+        self.page_cache = ResponseCache()
+
+    def _get_page(
+        self,
+        path: str,
+        account_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Response:
+        return self._request(
+            "GET",
+            path,
+            deadline=deadline,
+            headers=self.page_cache.headers((path, account_id)),
+        )
 
-    def _get_account_overview_page(self) -> str:
-        response = self.session.get(self._url(constants.PLATFORM_ACCOUNT_OVERVIEW_PATH))
+    def _get_account_overview_page(
+        self, deadline: Optional[Deadline] = None
+    ) -> Response:
+        response = self._get_page(
+            constants.PLATFORM_ACCOUNT_OVERVIEW_PATH, deadline=deadline
+        )
+        if response.status_code == 304:
+            return response
         assert (
             response.status_code == 200
         ), "Account overview page should return 200 status code"
         assert "My Investments" in str(response.content)
-        return str(response.content)
+        return response
 
-    def list(self) -> List[Account]:
-        page = self._get_account_overview_page()
-        parser = AccountOverviewParser(page)
-        return parser.extract_accounts()
+    def list(self, deadline: Union[Deadline, float, None] = None) -> List[Account]:
+        """
+        Get the user's accounts.
 
-    def _switch_account(self, account_id: str) -> None:
+        :param deadline: Seconds (or a shared `Deadline`) to finish within.
+        """
+        # Parsers pull in BeautifulSoup, so only import them once a page is parsed.
+        from easy_equities_client.accounts.parsers import AccountOverviewParser
+
+        def parse(page: bytes) -> List[Account]:
+            if self.parse_pool is not None:
+                return self.parse_pool.accounts(str(page)).result()
+            return AccountOverviewParser(str(page)).extract_accounts()
+
+        response = self._get_account_overview_page(Deadline.of(deadline))
+        return self.page_cache.parse(
+            (constants.PLATFORM_ACCOUNT_OVERVIEW_PATH, None), response, parse
+        )
+
+    def _switch_account(
+        self, account_id: str, deadline: Optional[Deadline] = None
+    ) -> None:
         """
         Switch the currently selected account to account with ID account_id.
         """
         if self.current_account != account_id:
+            # A switch that fails or times out may still have been applied by the
+            # platform, so the selected account is unknown until it succeeds.
+            self.current_account = None
             data = {'trustAccountId': account_id}
-            response = self.session.post(
-                self._url(constants.PLATFORM_UPDATE_CURRENCY_PATH), data
+            response = self._request(
+                "POST",
+                constants.PLATFORM_UPDATE_CURRENCY_PATH,
+                deadline=deadline,
+                data=data,
             )
             response.raise_for_status()
             assert (
@@ -46,44 +149,198 @@ class AccountsClient(Client):
             ), "Update currency request should return 200 status code"
             self.current_account = account_id
 
-    def valuations(self, account_id: str) -> Valuation:
-        self._switch_account(account_id)
-        response = self.session.get(
-            self._url(constants.PLATFORM_ACCOUNT_VALUATIONS_PATH)
-        )
+    def valuations(
+        self, account_id: str, deadline: Union[Deadline, float, None] = None
+    ) -> Valuation:
+        """
+        Get an account's valuations.
+
+        :param deadline: Seconds (or a shared `Deadline`) to finish within.
+        """
+        deadline = Deadline.of(deadline)
+        with self._lock:
+            self._switch_account(account_id, deadline)
+            response = self._request(
+                "GET", constants.PLATFORM_ACCOUNT_VALUATIONS_PATH, deadline=deadline
+            )
         response.raise_for_status()
         return json.loads(response.json())
 
-    def transactions(self, account_id) -> List[Transaction]:
-        self._switch_account(account_id)
-        response = self.session.get(self._url(constants.PLATFORM_TRANSACTIONS_PATH))
+    def transactions(
+        self, account_id, deadline: Union[Deadline, float, None] = None
+    ) -> List[Transaction]:
+        """
+        Get an account's transactions.
+
+        :param deadline: Seconds (or a shared `Deadline`) to finish within.
+        """
+        deadline = Deadline.of(deadline)
+        with self._lock:
+            self._switch_account(account_id, deadline)
+            response = self._request(
+                "GET", constants.PLATFORM_TRANSACTIONS_PATH, deadline=deadline
+            )
+        response.raise_for_status()
+        transactions = response.json()
+        if self.detail_cache is not None:
+            self.detail_cache.sync_transactions(account_id, transactions)
+        return transactions
+
+    def _get_holding_detail(
+        self, view_url: str, deadline: Optional[Deadline] = None
+    ) -> "Future[HoldingDetail]":
+        """
+        Fetch a holding's detail page. With a parse pool the page is parsed while the
+        next pages are fetched, otherwise the returned future is already done.
+        """
+        from easy_equities_client.accounts.detail_parsers import HoldingDetailParser
+
+        response = self._request("GET", view_url, deadline=deadline)
         response.raise_for_status()
-        return response.json()
+        if self.parse_pool is not None:
+            return self.parse_pool.detail(response.content)
+        future: Future = Future()
+        try:
+            future.set_result(HoldingDetailParser(response.content).extract_detail())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _detail_cache_for(
+        self, account_id: str, deadline: Optional[Deadline]
+    ) -> Tuple[Optional[HoldingDetailCache], Optional[str]]:
+        """
+        Return the detail cache to use for an account, after invalidating the details
+        of traded holdings, and the reason its details are stale, if they are.
+        """
+        if self.detail_cache is None:
+            return None, None
+        try:
+            self.transactions(account_id, deadline)
+        except Exception as e:
+            if deadline is None:
+                # Traded holdings are unknown, so fetch every detail page like a
+                # client without a detail cache.
+                logger.warning(
+                    "Transactions of account %s failed, fetching every detail page: %s",
+                    account_id,
+                    e,
+                )
+                return None, None
+            # Rather than fetch every detail page while the platform is struggling,
+            # serve the cached details marked as stale.
+            return self.detail_cache, f"Transactions unavailable: {_error_marker(e)}"
+        return self.detail_cache, None
 
-    def holdings(self, account_id: str, include_shares: bool = False) -> List[Holding]:
+    def _add_details(
+        self,
+        account_id: str,
+        holdings: List[Holding],
+        detail_fields: List[str],
+        deadline: Optional[Deadline],
+    ) -> None:
+        """
+        Set the detail fields of holdings from the detail cache or their detail pages.
+        With a deadline, holdings whose detail pages fail get an "error" field instead.
+        """
+        cache, stale = self._detail_cache_for(account_id, deadline)
+        # Detail pages show the share counts of the selected account.
+        fetched = []
+        for holding in holdings:
+            detail = cache.get(account_id, holding['view_url']) if cache else None
+            if detail is not None:
+                _set_detail_fields(holding, detail, detail_fields)
+                if stale is not None:
+                    holding['stale'] = stale
+                continue
+            try:
+                future = self._get_holding_detail(holding['view_url'], deadline)
+            except Exception as e:
+                _partial_result(holding, e, deadline)
+                continue
+            fetched.append((holding, future))
+        for holding, future in fetched:
+            try:
+                detail = future.result(None if deadline is None else deadline.remaining())
+            except Exception as e:
+                _partial_result(holding, e, deadline)
+                continue
+            if self.detail_cache is not None:
+                self.detail_cache.set(
+                    account_id, holding['view_url'], holding['contract_code'], detail
+                )
+            _set_detail_fields(holding, detail, detail_fields)
+
+    def holdings(
+        self,
+        account_id: str,
+        include_shares: bool = False,
+        fields: Optional[Iterable[str]] = None,
+        deadline: Union[Deadline, float, None] = None,
+    ) -> List[Holding]:
         """
         Get an account's holdings/stocks.
 
         :param account_id: String account ID.
-        :param include_shares: Whether to fetch the number of shares per holding. Create an extra
-        HTTP request per holding.
+        :param include_shares: Whether to fetch the number of shares per holding. Create an
+        extra HTTP request per holding, unless the holding's share count is in the detail
+        cache and there haven't been any new transactions for it.
+        :param fields: Only return these fields of each holding, e.g. ["name", "current_value"].
+        Only the requested fields are extracted from the holdings page, and detail pages are
+        only fetched if a field from them (HOLDING_DETAIL_FIELDS, e.g. "shares") is requested.
+        Defaults to every field on the holdings page. include_shares adds "shares".
+        :param deadline: Seconds (or a shared `Deadline`) to finish within. Detail pages that
+        fail or aren't fetched in time don't fail the call: their holdings are returned with
+        an "error" field instead of the detail fields. If the account's transactions can't be
+        fetched in time, cached details are returned with a "stale" field.
         """
-        self._switch_account(account_id)
-        response = self.session.get(self._url(constants.PLATFORM_HOLDINGS_PATH))
-        response.raise_for_status()
-        parser = AccountHoldingsParser(response.content)
-        holdings = parser.extract_holdings()
+        from easy_equities_client.accounts.parsers import AccountHoldingsParser
+
+        fields = list(HOLDING_PAGE_FIELDS if fields is None else fields)
         if include_shares:
-            for holding in holdings:
-                response = self.session.get(self._url(holding['view_url']))
-                soup = BeautifulSoup(response.content, "html.parser")
-                whole_shares = soup.find(
-                    lambda tag: '#Shares' in tag
-                ).next_sibling.next_sibling.text.strip()
-                partial_shares = soup.find(
-                    lambda tag: '#FSR' in tag
-                ).next_sibling.next_sibling.text.strip()
-                holding['shares'] = f"{whole_shares}{partial_shares}"
+            fields.append('shares')
+        fields = list(dict.fromkeys(fields))
+        unknown = set(fields) - set(HOLDING_PAGE_FIELDS) - set(HOLDING_DETAIL_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown holding fields: {', '.join(sorted(unknown))}")
+        detail_fields = [field for field in fields if field in HOLDING_DETAIL_FIELDS]
+        # Detail pages are found by view URL and cached by contract code.
+        needed = set(fields)
+        if detail_fields:
+            needed |= {'view_url', 'contract_code'}
+        page_fields = [field for field in HOLDING_PAGE_FIELDS if field in needed]
+
+        def parse(page: bytes) -> List[Holding]:
+            if self.parse_pool is not None:
+                return self.parse_pool.holdings(page, page_fields).result()
+            return AccountHoldingsParser(page).extract_holdings(page_fields)
+
+        deadline = Deadline.of(deadline)
+        with self._lock:
+            self._switch_account(account_id, deadline)
+            # Each projection has its own parsed result, so it's cached separately.
+            key = (constants.PLATFORM_HOLDINGS_PATH, account_id, tuple(page_fields))
+            response = self._request(
+                "GET",
+                constants.PLATFORM_HOLDINGS_PATH,
+                deadline=deadline,
+                headers=self.page_cache.headers(key),
+            )
+            response.raise_for_status()
+            holdings = self.page_cache.parse(key, response, parse)
+            if self.instrument_index is not None:
+                self.instrument_index.add_holdings(holdings)
+            if detail_fields:
+                self._add_details(account_id, holdings, detail_fields, deadline)
+        if len(page_fields) != len(fields) - len(detail_fields):
+            holdings = [
+                Holding(
+                    (field, holding[field])  # type: ignore
+                    for field in fields + ['error', 'stale']
+                    if field in holding
+                )
+                for holding in holdings
+            ]
         return holdings
 
     def login(self) -> None:
@@ -91,8 +348,9 @@ class AccountsClient(Client):
         Authenticates with EasyEquities using credentials from a .env file.
         The .env file should contain EASYEQUITIES_USERNAME and EASYEQUITIES_PASSWORD.
         """
-        from dotenv import load_dotenv
         import os
+
+        from dotenv import load_dotenv
         load_dotenv()
         username = os.getenv("EASYEQUITIES_USERNAME")
         password = os.getenv("EASYEQUITIES_PASSWORD")
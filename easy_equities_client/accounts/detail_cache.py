@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from easy_equities_client.accounts.types import HoldingDetail, Transaction
+
+
+def _transaction_marker(transaction: Transaction) -> str:
+    return f"{transaction.get('TransactionDate', '')}|{transaction.get('LogId', '')}"
+
+
+class HoldingDetailCache:
+    """
+    Parsed holding detail pages (e.g. share counts) per account, keyed by the
+    holding's detail page URL.
+
+    Share counts only change when there's a trade, so a holding's cached detail is
+    kept until `sync_transactions` sees a new transaction for its contract code.
+    The cache can be saved to and loaded from a JSON file.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        :param path: JSON file to load the cache from, if it exists, and save it to.
+        """
+        self.path = path
+        # {account_id: {view_url: {"contract_code": ..., "detail": {...}}}}
+        self._entries: Dict[str, Dict[str, dict]] = {}
+        # {account_id: {contract_code: marker of the latest transaction}}
+        self._markers: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def get(self, account_id: str, view_url: str) -> Optional[HoldingDetail]:
+        entry = self._entries.get(account_id, {}).get(view_url)
+        return HoldingDetail(**entry["detail"]) if entry else None
+
+    def set(
+        self,
+        account_id: str,
+        view_url: str,
+        contract_code: str,
+        detail: HoldingDetail,
+    ) -> None:
+        with self._lock:
+            self._entries.setdefault(account_id, {})[view_url] = {
+                "contract_code": contract_code,
+                "detail": dict(detail),
+            }
+
+    def sync_transactions(
+        self, account_id: str, transactions: Iterable[Transaction]
+    ) -> Set[str]:
+        """
+        Invalidate the cached details of every contract code in the account with a
+        transaction that hasn't been seen before. Everything cached for the account
+        is invalidated the first time its transactions are synced.
+
+        :return: The contract codes that were invalidated.
+        """
+        markers: Dict[str, str] = {}
+        for transaction in transactions:
+            code = transaction.get('ContractCode')
+            if code:
+                marker = _transaction_marker(transaction)
+                markers[code] = max(markers.get(code, ""), marker)
+        with self._lock:
+            entries = self._entries.get(account_id, {})
+            previous = self._markers.get(account_id)
+            if previous is None:
+                changed = {entry["contract_code"] for entry in entries.values()}
+            else:
+                changed = {
+                    code
+                    for code in markers.keys() | previous.keys()
+                    if markers.get(code) != previous.get(code)
+                }
+            self._entries[account_id] = {
+                view_url: entry
+                for view_url, entry in entries.items()
+                if entry["contract_code"] not in changed
+            }
+            self._markers[account_id] = markers
+        return changed
+
+    def invalidate(self, account_id: Optional[str] = None) -> None:
+        """
+        Remove the cached details of one account, or of every account.
+        """
+        with self._lock:
+            if account_id is None:
+                self._entries.clear()
+                self._markers.clear()
+            else:
+                self._entries.pop(account_id, None)
+                self._markers.pop(account_id, None)
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path:
+            raise ValueError("No path to save the holding detail cache to.")
+        with self._lock:
+            data = json.dumps({"entries": self._entries, "markers": self._markers})
+        with open(path, "w") as f:
+            f.write(data)
+
+    def load(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path:
+            raise ValueError("No path to load the holding detail cache from.")
+        with open(path) as f:
+            data = json.load(f)
+        with self._lock:
+            self._entries = data["entries"]
+            self._markers = data["markers"]
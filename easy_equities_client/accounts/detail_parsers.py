@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple, Union
+
+from easy_equities_client.accounts.types import HoldingDetail
+
+# Label text on the holding detail page and the HoldingDetail field of its value.
+# The tokenizer stops as soon as every label has been found.
+DETAIL_LABELS: Dict[str, str] = {
+    '#Shares': 'whole_shares',
+    '#FSR': 'fsr_shares',
+}
+
+# Fields without which a detail page can't be used.
+REQUIRED_FIELDS = ('whole_shares', 'fsr_shares')
+
+# Elements that never have an end tag.
+_VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+}  # fmt: skip
+
+
+class _AllFieldsFound(Exception):
+    pass
+
+
+class _DetailTokenizer(HTMLParser):
+    """
+    Find each label's value in a single pass over the page's tokens, without
+    building a tree: the value is the text of the first element after the element
+    containing the label, at the same depth.
+    """
+
+    def __init__(self, labels: Dict[str, str]):
+        super().__init__(convert_charrefs=True)
+        self.labels = labels
+        self.values: Dict[str, str] = {}
+        self._depth = 0
+        # (field, depth) of the open element containing a label
+        self._label: Optional[Tuple[str, int]] = None
+        # (field, depth) of the label element whose next sibling holds the value
+        self._pending: Optional[Tuple[str, int]] = None
+        # (field, depth, text) of the value element being read
+        self._capture: Optional[Tuple[str, int, List[str]]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_ELEMENTS:
+            return
+        self._depth += 1
+        if self._pending and self._pending[1] == self._depth:
+            self._capture = (self._pending[0], self._depth, [])
+            self._pending = None
+
+    def handle_endtag(self, tag):
+        if tag in _VOID_ELEMENTS or self._depth == 0:
+            return
+        if self._capture and self._capture[1] == self._depth:
+            field, _, text = self._capture
+            self.values[field] = "".join(text).strip()
+            self._capture = None
+            if len(self.values) == len(self.labels):
+                raise _AllFieldsFound()
+        if self._label and self._label[1] == self._depth:
+            self._pending = self._label
+            self._label = None
+        elif self._pending and self._pending[1] > self._depth:
+            # The label's parent closed before another element followed the label.
+            self._pending = None
+        self._depth -= 1
+
+    def handle_data(self, data):
+        if self._capture:
+            self._capture[2].append(data)
+            return
+        field = self.labels.get(data.strip())
+        if field and field not in self.values:
+            self._label = (field, self._depth)
+
+
+@dataclass
+class HoldingDetailParser:
+    """
+    Parse a holding's detail page (the holding's `view_url`) given the html contents
+    of the page.
+    """
+
+    page: Union[bytes, str]
+
+    def _text(self) -> str:
+        if isinstance(self.page, bytes):
+            return self.page.decode('utf-8', errors='replace')
+        return self.page
+
+    def _tokenize(self) -> Dict[str, str]:
+        tokenizer = _DetailTokenizer(DETAIL_LABELS)
+        try:
+            tokenizer.feed(self._text())
+            tokenizer.close()
+        except _AllFieldsFound:
+            pass
+        return tokenizer.values
+
+    def _soup_scan(self) -> Dict[str, str]:
+        """
+        Fall back to BeautifulSoup for pages the tokenizer couldn't follow, e.g.
+        with unclosed elements. Still a single pass over the document's strings.
+        """
+        from bs4 import BeautifulSoup
+
+        values: Dict[str, str] = {}
+        soup = BeautifulSoup(self.page, "html.parser")
+        for string in soup.find_all(string=True):
+            field = DETAIL_LABELS.get(string.strip())
+            if field and field not in values and string.parent is not None:
+                # Like the tokenizer, skip elements without content such as <br>.
+                value = string.parent.find_next_sibling(
+                    lambda tag: tag.name not in _VOID_ELEMENTS
+                )
+                if value is not None:
+                    values[field] = value.text.strip()
+        return values
+
+    def extract_detail(self) -> HoldingDetail:
+        """
+        Return the fields found on the detail page.
+
+        :raises ValueError: if the share counts aren't on the page.
+        """
+        values = self._tokenize()
+        if not all(field in values for field in REQUIRED_FIELDS):
+            values = self._soup_scan()
+        missing = [field for field in REQUIRED_FIELDS if field not in values]
+        if missing:
+            raise ValueError(
+                f"Could not find {', '.join(missing)} on holding detail page"
+            )
+        detail: HoldingDetail = {**values}  # type: ignore
+        detail['shares'] = f"{values['whole_shares']}{values['fsr_shares']}"
+        return detail
@@ -0,0 +1,130 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, List, Optional
+
+from easy_equities_client.accounts.types import Holding
+
+
+def holding_key(holding: Holding) -> str:
+    """
+    Return the key identifying a holding between snapshots: its contract code,
+    falling back to its ISIN, detail URL and name. Holdings projected to none of
+    these fields are keyed by their digest, so a change shows as removed and added.
+    """
+    return (
+        holding.get('contract_code')
+        or holding.get('isin')
+        or holding.get('view_url')
+        or holding.get('name')
+        or holding_digest(holding).hex()
+    )
+
+
+def holding_digest(holding: Holding) -> bytes:
+    """
+    Return a digest of all the fields of a holding.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for name, value in sorted(holding.items()):
+        h.update(name.encode())
+        h.update(b'\x00')
+        h.update(str(value).encode())
+        h.update(b'\x01')
+    return h.digest()
+
+
+@dataclass
+class HoldingsDiff:
+    """
+    The holdings that were added, removed or changed between two snapshots.
+    """
+
+    added: List[Holding] = field(default_factory=list)
+    removed: List[Holding] = field(default_factory=list)
+    changed: List[Holding] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def to_dict(self) -> dict:
+        return {
+            'added': self.added,
+            'removed': self.removed,
+            'changed': self.changed,
+        }
+
+
+@dataclass
+class HoldingsSnapshot:
+    """
+    Digests of a list of holdings, keyed by `holding_key`.
+    """
+
+    holdings: Dict[str, Holding]
+    digests: Dict[str, bytes]
+    digest: bytes
+
+    @classmethod
+    def from_holdings(cls, holdings: Iterable[Holding]) -> "HoldingsSnapshot":
+        by_key = {holding_key(holding): holding for holding in holdings}
+        digests = {key: holding_digest(holding) for key, holding in by_key.items()}
+        total = hashlib.blake2b(digest_size=16)
+        for key in sorted(digests):
+            total.update(digests[key])
+        return cls(holdings=by_key, digests=digests, digest=total.digest())
+
+
+def diff_holdings(old: HoldingsSnapshot, new: HoldingsSnapshot) -> HoldingsDiff:
+    """
+    Compare two snapshots. Changed holdings are reported with their new values.
+    """
+    if old.digest == new.digest:
+        return HoldingsDiff()
+    return HoldingsDiff(
+        added=[h for key, h in new.holdings.items() if key not in old.digests],
+        removed=[h for key, h in old.holdings.items() if key not in new.digests],
+        changed=[
+            h
+            for key, h in new.holdings.items()
+            if key in old.digests and old.digests[key] != new.digests[key]
+        ],
+    )
+
+
+class HoldingsDiffer:
+    """
+    Keep the last snapshot of holdings per key, e.g. an account ID, and emit only what
+    changed. Holdings fetched with different options (e.g. ``include_shares``) should
+    be kept under different keys.
+
+    Example::
+
+        differ = HoldingsDiffer()
+        diff = differ.update(account.id, client.accounts.holdings(account.id))
+        if diff:
+            publish(diff.to_dict())
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[Hashable, HoldingsSnapshot] = {}
+
+    def update(self, key: Hashable, holdings: Iterable[Holding]) -> HoldingsDiff:
+        """
+        Record the latest holdings under a key and return the difference with the
+        previous holdings. Every holding is reported as added on the first update.
+        """
+        new = HoldingsSnapshot.from_holdings(holdings)
+        old = self._snapshots.get(key)
+        self._snapshots[key] = new
+        if old is None:
+            return HoldingsDiff(added=list(new.holdings.values()))
+        return diff_holdings(old, new)
+
+    def snapshot(self, key: Hashable) -> Optional[HoldingsSnapshot]:
+        return self._snapshots.get(key)
+
+    def reset(self, key: Optional[Hashable] = None) -> None:
+        if key is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(key, None)
@@ -0,0 +1,131 @@
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import astuple, fields
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from easy_equities_client.accounts.types import (
+    HOLDING_PAGE_FIELDS,
+    Account,
+    Holding,
+    HoldingDetail,
+)
+
+_ACCOUNT_FIELDS = [f.name for f in fields(Account)]
+
+
+# Functions run in the worker processes. They receive the raw page and return plain
+# tuples, which are cheaper to send back between processes than dicts or objects.
+
+
+def _parse_holdings(
+    page: bytes, fields: Sequence[str] = HOLDING_PAGE_FIELDS
+) -> List[Tuple[str, ...]]:
+    from easy_equities_client.accounts.parsers import AccountHoldingsParser
+
+    return [
+        tuple(holding.get(field, "") for field in fields)  # type: ignore
+        for holding in AccountHoldingsParser(page).extract_holdings(fields)
+    ]
+
+
+def _parse_accounts(page: str) -> List[Tuple[str, ...]]:
+    from easy_equities_client.accounts.parsers import AccountOverviewParser
+
+    accounts = AccountOverviewParser(page).extract_accounts()
+    return [astuple(account) for account in accounts]
+
+
+def _parse_detail(page: bytes) -> HoldingDetail:
+    from easy_equities_client.accounts.detail_parsers import HoldingDetailParser
+
+    return HoldingDetailParser(page).extract_detail()
+
+
+def _holdings(
+    rows: List[Tuple[str, ...]], fields: Sequence[str] = HOLDING_PAGE_FIELDS
+) -> List[Holding]:
+    return [Holding(zip(fields, row)) for row in rows]  # type: ignore
+
+
+def _accounts(rows: List[Tuple[str, ...]]) -> List[Account]:
+    return [Account(**dict(zip(_ACCOUNT_FIELDS, row))) for row in rows]
+
+
+def _then(future: "Future", function: Callable) -> "Future":
+    result: Future = Future()
+
+    def done(f):
+        try:
+            result.set_result(function(f.result()))
+        except Exception as e:
+            result.set_exception(e)
+
+    future.add_done_callback(done)
+    return result
+
+
+class ParsePool:
+    """
+    Parse holdings, account overview and holding detail pages in worker processes,
+    so that parsing many pages uses every core instead of being limited by the GIL.
+
+    Submitting a page returns a Future immediately, so pages can keep being fetched
+    while earlier ones are parsed.
+
+    Example::
+
+        with ParsePool() as pool:
+            client = EasyEquitiesClient(parse_pool=pool)
+            ...
+            for holdings in pool.map_holdings(archived_pages):
+                ...
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, executor: Executor = None):
+        """
+        :param max_workers: Number of worker processes. Defaults to the number of CPUs.
+        :param executor: Executor to use instead of creating a process pool.
+        """
+        self.executor = executor or ProcessPoolExecutor(max_workers=max_workers)
+
+    def holdings(
+        self, page: bytes, fields: Sequence[str] = HOLDING_PAGE_FIELDS
+    ) -> "Future[List[Holding]]":
+        fields = list(fields)
+        return _then(
+            self.executor.submit(_parse_holdings, page, fields),
+            partial(_holdings, fields=fields),
+        )
+
+    def accounts(self, page: str) -> "Future[List[Account]]":
+        return _then(self.executor.submit(_parse_accounts, page), _accounts)
+
+    def detail(self, page: bytes) -> "Future[HoldingDetail]":
+        return self.executor.submit(_parse_detail, page)
+
+    def map_holdings(
+        self, pages: Iterable[bytes], chunksize: int = 1
+    ) -> Iterator[List[Holding]]:
+        """
+        Parse many holdings pages, yielding their holdings in the order of the pages.
+        """
+        for rows in self.executor.map(_parse_holdings, pages, chunksize=chunksize):
+            yield _holdings(rows)
+
+    def map_details(
+        self, pages: Iterable[bytes], chunksize: int = 1
+    ) -> Iterator[HoldingDetail]:
+        """
+        Parse many holding detail pages, yielding their details in the order of the
+        pages.
+        """
+        return self.executor.map(_parse_detail, pages, chunksize=chunksize)
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+    def __enter__(self) -> "ParsePool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,10 +1,11 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from functools import cached_property
+from typing import Iterable, List, Optional
 
 from bs4 import BeautifulSoup
 from bs4.element import Tag
 
-from easy_equities_client.accounts.types import Account, Holding
+from easy_equities_client.accounts.types import HOLDING_PAGE_FIELDS, Account, Holding
 
 
 def extract_account_info(account_div: Tag) -> Optional[Account]:
@@ -50,6 +51,13 @@ class HoldingFieldNotFoundException(Exception):
 
 
 class HoldingDivParser:
+    """
+    Extract the fields of a holding from its div on the holdings page.
+
+    `name`, `img` and `view_url` are looked up once per div, since the name is also
+    used for hashing and the contract code and ISIN are derived from the others.
+    """
+
     def __init__(self, div: Tag):
         self.div = div
 
@@ -59,7 +67,7 @@ class HoldingDivParser:
     def __hash__(self):
         return hash(self.name)
 
-    @property
+    @cached_property
     def name(self) -> str:
         # First try to find the equity-image-as-text div
         name_div = self.div.find(attrs={'class': 'equity-image-as-text'})
@@ -103,7 +111,7 @@ class HoldingDivParser:
     def current_price(self) -> str:
         return self._find_cell_value('current-price-cell')
 
-    @property
+    @cached_property
     def img(self) -> str:
         img = self.div.find(attrs={'class': 'instrument'})
         return img.attrs['src'] if img and 'src' in img.attrs else ""
@@ -118,7 +126,7 @@ class HoldingDivParser:
         except ValueError:
             return ""
 
-    @property
+    @cached_property
     def view_url(self) -> str:
         try:
             container = self.div.find(attrs={'class': 'collapse-container'})
@@ -137,167 +145,10 @@ class HoldingDivParser:
             return url.split('=')[-1]
         return ""
 
-    def to_dict(self) -> Holding:
-        fields = [
-            'name',
-            'contract_code',
-            'purchase_value',
-            'current_value',
-            'current_price',
-            'img',
-            'view_url',
-            'isin',
-        ]
-        data: Holding = {}
-        for field in fields:
-            try:
-                data[field] = getattr(self, field)  # type: ignore
-            except Exception as e:
-                raise HoldingFieldNotFoundException(field, e)
-
-        return data
-
-    def _find_cell_value(self, class_name: str) -> str:
-        cell = self.div.find(attrs={'class': class_name})
-        if cell:
-            value = cell.find('span')
-            if value:
-                return value.text.strip()
-            return cell.text.strip()
-        return "0"
-
-    @property
-    def purchase_value(self) -> str:
-        return self._find_cell_value('purchase-value-cell')
-
-    @property
-    def current_value(self) -> str:
-        return self._find_cell_value('current-value-cell')
-
-    @property
-    def current_price(self) -> str:
-        return self._find_cell_value('current-price-cell')
-
-    @property
-    def img(self) -> str:
-        img = self.div.find(attrs={'class': 'instrument'})
-        return img.attrs['src'] if img and 'src' in img.attrs else ""
-
-    @property
-    def contract_code(self) -> str:
-        if not self.img:
-            return ""
-        try:
-            filename = self.img[self.img.rindex('/') + 1:]
-            return filename[:filename.rindex('.')] if '.' in filename else filename
-        except ValueError:
-            return ""
-
-    @property
-    def view_url(self) -> str:
-        try:
-            container = self.div.find(attrs={'class': 'collapse-container'})
-            if container:
-                span = container.find('span')
-                if span and 'data-detailviewurl' in span.attrs:
-                    return span.attrs['data-detailviewurl']
-        except (AttributeError, KeyError):
-            pass
-        return ""
-
-    @property
-    def isin(self) -> str:
-        url = self.view_url
-        if url and '=' in url:
-            return url.split('=')[-1]
-        return ""
-
-    def to_dict(self) -> Holding:
-        fields = [
-            'name',
-            'contract_code',
-            'purchase_value',
-            'current_value',
-            'current_price',
-            'img',
-            'view_url',
-            'isin',
-        ]
-        data: Holding = {}
-        for field in fields:
-            try:
-                data[field] = getattr(self, field)  # type: ignore
-            except Exception as e:
-                raise HoldingFieldNotFoundException(field, e)
-
-        return data
-
-    def _find_cell_value(self, class_name: str) -> str:
-        cell = self.div.find(attrs={'class': class_name})
-        if cell:
-            value = cell.find('span')
-            if value:
-                return value.text.strip()
-            return cell.text.strip()
-        return "0"
-
-    @property
-    def purchase_value(self) -> str:
-        return self._find_cell_value('purchase-value-cell')
-
-    @property
-    def current_value(self) -> str:
-        return self._find_cell_value('current-value-cell')
-
-    @property
-    def current_price(self) -> str:
-        return self._find_cell_value('current-price-cell')
-
-    @property
-    def img(self) -> str:
-        img = self.div.find(attrs={'class': 'instrument'})
-        return img.attrs['src'] if img and 'src' in img.attrs else ""
-
-    @property
-    def contract_code(self) -> str:
-        if not self.img:
-            return ""
-        try:
-            filename = self.img[self.img.rindex('/') + 1:]
-            return filename[:filename.rindex('.')] if '.' in filename else filename
-        except ValueError:
-            return ""
-
-    @property
-    def view_url(self) -> str:
-        try:
-            container = self.div.find(attrs={'class': 'collapse-container'})
-            if container:
-                span = container.find('span')
-                if span and 'data-detailviewurl' in span.attrs:
-                    return span.attrs['data-detailviewurl']
-        except (AttributeError, KeyError):
-            pass
-        return ""
-
-    @property
-    def isin(self) -> str:
-        url = self.view_url
-        if url and '=' in url:
-            return url.split('=')[-1]
-        return ""
-
-    def to_dict(self) -> Holding:
-        fields = [
-            'name',
-            'contract_code',
-            'purchase_value',
-            'current_value',
-            'current_price',
-            'img',
-            'view_url',
-            'isin',
-        ]
+    def to_dict(self, fields: Iterable[str] = HOLDING_PAGE_FIELDS) -> Holding:
+        """
+        :param fields: Fields to extract, defaults to every field on the holdings page.
+        """
         data: Holding = {}
         for field in fields:
             try:
@@ -316,9 +167,13 @@ class AccountHoldingsParser:
 
     page: bytes
 
-    def extract_holdings(self) -> List[Holding]:
+    def extract_holdings(
+        self, fields: Iterable[str] = HOLDING_PAGE_FIELDS
+    ) -> List[Holding]:
         """
         Return the holdings found on the holdings page.
+
+        :param fields: Fields to extract, defaults to every field on the holdings page.
         """
         soup = BeautifulSoup(self.page, "html.parser")
         # Get all holding containers that are not in the header
@@ -330,4 +185,4 @@ class AccountHoldingsParser:
                 if container and 'holding-inner-container' in container.get('class', []):
                     holdings_divs.append(container)
         divs = set([HoldingDivParser(holding_div) for holding_div in holdings_divs])
-        return [div.to_dict() for div in divs]
+        return [div.to_dict(fields) for div in divs]
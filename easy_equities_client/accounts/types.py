@@ -24,7 +24,36 @@ class Holding(TypedDict, total=False):
     img: str
     view_url: str
     isin: str
+    # From the holding's detail page
     shares: str
+    whole_shares: str
+    fsr_shares: str
+    # Why the detail fields are missing, when a call with a deadline returns partial
+    # results
+    error: str
+    # Why the detail fields, served from the cache, may be out of date
+    stale: str
+
+
+class HoldingDetail(TypedDict, total=False):
+    whole_shares: str
+    fsr_shares: str
+    shares: str
+
+
+# Holding fields found on the holdings page, in the order they're extracted.
+HOLDING_PAGE_FIELDS = [
+    'name',
+    'contract_code',
+    'purchase_value',
+    'current_value',
+    'current_price',
+    'img',
+    'view_url',
+    'isin',
+]
+# Holding fields that need a request for the holding's detail page.
+HOLDING_DETAIL_FIELDS = list(HoldingDetail.__annotations__)
 
 
 class Transaction(TypedDict):
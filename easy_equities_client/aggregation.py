@@ -0,0 +1,156 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from easy_equities_client.accounts.types import Account, Holding, Valuation
+from easy_equities_client.clients import (
+    EasyEquitiesClient,
+    PlatformClient,
+    SatrixClient,
+)
+from easy_equities_client.constants import Platform
+
+
+@dataclass
+class PlatformAccount:
+    """
+    An account together with the platform it belongs to and its fetched data.
+    """
+
+    platform: Platform
+    account: Account
+    holdings: List[Holding] = field(default_factory=list)
+    valuations: Optional[Valuation] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class Portfolio:
+    """
+    The accounts of all platforms in one view.
+    """
+
+    accounts: List[PlatformAccount] = field(default_factory=list)
+    errors: Dict[Platform, str] = field(default_factory=dict)
+
+    def holdings(self) -> List[Tuple[Platform, Account, Holding]]:
+        """
+        Return every holding tagged with its platform and account.
+        """
+        return [
+            (account.platform, account.account, holding)
+            for account in self.accounts
+            for holding in account.holdings
+        ]
+
+
+class AggregatedClient:
+    """
+    Use EasyEquities and Satrix (or any platform clients) as one.
+
+    Each platform has its own session, so platforms are logged into and fetched from
+    in parallel. Accounts on the same platform are fetched one after the other since
+    they share the platform's selected account.
+
+    Example::
+
+        client = AggregatedClient()
+        client.login({
+            Platform.EASY_EQUITIES_ZA: ("username", "password"),
+            Platform.SATRIX: ("username", "password"),
+        })
+        portfolio = client.portfolio()
+    """
+
+    def __init__(self, clients: Optional[Dict[Platform, PlatformClient]] = None):
+        if clients is None:
+            clients = {
+                Platform.EASY_EQUITIES_ZA: EasyEquitiesClient(),
+                Platform.SATRIX: SatrixClient(),
+            }
+        self.clients = clients
+
+    def _map(self, function, platforms) -> dict:
+        with ThreadPoolExecutor(max_workers=len(platforms) or 1) as executor:
+            return {
+                platform: executor.submit(function, platform) for platform in platforms
+            }
+
+    def login(self, credentials: Dict[Platform, Tuple[str, str]]) -> bool:
+        """
+        Log into the platforms concurrently. Platforms without credentials are left
+        out of the aggregated client.
+
+        :param credentials: (username, password) per platform.
+        :return: boolean True if all platforms were logged into.
+        :raises Exception: the first login that failed.
+        """
+        self.clients = {
+            platform: client
+            for platform, client in self.clients.items()
+            if platform in credentials
+        }
+        futures = self._map(
+            lambda platform: self.clients[platform].login(*credentials[platform]),
+            list(self.clients),
+        )
+        for future in futures.values():
+            future.result()
+        return True
+
+    def _fetch_platform(
+        self, platform: Platform, include_shares: bool, include_valuations: bool
+    ) -> List[PlatformAccount]:
+        client = self.clients[platform]
+        platform_accounts = []
+        for account in client.accounts.list():
+            platform_account = PlatformAccount(platform=platform, account=account)
+            try:
+                platform_account.holdings = client.accounts.holdings(
+                    account.id, include_shares
+                )
+                if include_valuations:
+                    platform_account.valuations = client.accounts.valuations(account.id)
+            except Exception as e:
+                platform_account.error = str(e)
+            platform_accounts.append(platform_account)
+        return platform_accounts
+
+    def accounts(self) -> List[PlatformAccount]:
+        """
+        List the accounts of all platforms, without their holdings or valuations.
+        """
+        futures = self._map(
+            lambda platform: self.clients[platform].accounts.list(), list(self.clients)
+        )
+        return [
+            PlatformAccount(platform=platform, account=account)
+            for platform, future in futures.items()
+            for account in future.result()
+        ]
+
+    def portfolio(
+        self, include_shares: bool = False, include_valuations: bool = True
+    ) -> Portfolio:
+        """
+        Fetch the accounts, holdings and valuations of all platforms in parallel.
+
+        A platform that fails is reported in `Portfolio.errors` and an account that
+        fails in `PlatformAccount.error`; the rest of the portfolio is still returned.
+
+        :param include_shares: Whether to fetch the number of shares per holding.
+        :param include_valuations: Whether to fetch each account's valuations.
+        """
+        futures = self._map(
+            lambda platform: self._fetch_platform(
+                platform, include_shares, include_valuations
+            ),
+            list(self.clients),
+        )
+        portfolio = Portfolio()
+        for platform, future in futures.items():
+            try:
+                portfolio.accounts.extend(future.result())
+            except Exception as e:
+                portfolio.errors[platform] = str(e)
+        return portfolio
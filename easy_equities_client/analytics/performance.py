@@ -0,0 +1,412 @@
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from easy_equities_client.accounts.types import Transaction
+from easy_equities_client.analytics.valuation import (
+    PortfolioValuation,
+    _days,
+    parse_transaction_date,
+    transaction_quantity,
+)
+from easy_equities_client.instruments.types import HistoricalPrices, Period
+from easy_equities_client.utils.caching import TTLCache
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def simple_returns(prices: np.ndarray) -> np.ndarray:
+    """
+    Return the period on period returns of a price series, or of each column of a
+    day x instrument array.
+    """
+    prices = np.asarray(prices, dtype=float)
+    return prices[1:] / prices[:-1] - 1
+
+
+def volatility(
+    prices: np.ndarray, periods_per_year: int = TRADING_DAYS_PER_YEAR
+) -> np.ndarray:
+    """
+    Annualised volatility (standard deviation of log returns) of a price series, or
+    of each column of a day x instrument array.
+    """
+    prices = np.asarray(prices, dtype=float)
+    log_returns = np.diff(np.log(prices), axis=0)
+    return np.nanstd(log_returns, axis=0, ddof=1) * np.sqrt(periods_per_year)
+
+
+def correlation_matrix(prices: np.ndarray) -> np.ndarray:
+    """
+    Correlation matrix of the daily returns of each column of a day x instrument
+    price array, using the days on which every instrument has a price.
+    """
+    returns = simple_returns(prices)
+    returns = returns[~np.isnan(returns).any(axis=1)]
+    if returns.shape[1] == 1:
+        return np.ones((1, 1))
+    return np.corrcoef(returns, rowvar=False)
+
+
+def time_weighted_returns(values: np.ndarray, flows: np.ndarray) -> np.ndarray:
+    """
+    Daily returns of a portfolio with the effect of cash flows removed.
+
+    :param values: The portfolio's value at the end of each day.
+    :param flows: Money put into (positive) or taken out of (negative) the portfolio
+    on each day, included in that day's value.
+    """
+    values = np.asarray(values, dtype=float)
+    flows = np.asarray(flows, dtype=float)
+    previous = values[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = (values[1:] - flows[1:]) / previous - 1
+    return np.where(previous > 0, returns, 0.0)
+
+
+def time_weighted_return(values: np.ndarray, flows: np.ndarray) -> float:
+    """
+    Time-weighted return over the whole series: daily returns, excluding cash
+    flows, compounded.
+    """
+    return float(np.prod(1 + time_weighted_returns(values, flows)) - 1)
+
+
+def money_weighted_return(
+    dates: Sequence[date],
+    flows: Sequence[float],
+    final_value: float,
+    final_date: date,
+    tolerance: float = 1e-10,
+    max_iterations: int = 100,
+) -> float:
+    """
+    Annualised money-weighted return (XIRR): the rate at which the cash flows put
+    into the portfolio grow to its final value.
+
+    :param flows: Money put into (positive) or taken out of (negative) the portfolio
+    on each of `dates`.
+    """
+    days = np.append(_days(dates), _days([final_date]))
+    years = (days - days.min()).astype(float) / 365.0
+    # From the investor's point of view: money in is negative, the final value positive.
+    cash = np.append(-np.asarray(flows, dtype=float), final_value)
+
+    def npv(rate: float) -> Tuple[float, float]:
+        discount = (1 + rate) ** -years
+        return float(np.sum(cash * discount)), float(
+            np.sum(-years * cash * discount / (1 + rate))
+        )
+
+    # Newton's method, falling back to bisection if it doesn't converge.
+    rate = 0.1
+    for _ in range(max_iterations):
+        value, derivative = npv(rate)
+        if abs(value) < tolerance:
+            return rate
+        if derivative == 0:
+            break
+        rate -= value / derivative
+        if rate <= -1:
+            break
+    low, high = -0.9999, 1.0
+    while npv(high)[0] > 0 and high < 1e6:
+        high *= 2
+    if np.sign(npv(low)[0]) == np.sign(npv(high)[0]):
+        return float("nan")
+    for _ in range(max_iterations * 2):
+        rate = (low + high) / 2
+        value = npv(rate)[0]
+        if abs(value) < tolerance:
+            break
+        if np.sign(value) == np.sign(npv(low)[0]):
+            low = rate
+        else:
+            high = rate
+    return rate
+
+
+def trade_flow(transaction: Transaction) -> float:
+    """
+    Money a trade put into (buy) or took out of (sell) the account's holdings, or 0
+    for transactions that don't trade shares.
+    """
+    if not transaction_quantity(transaction):
+        return 0.0
+    return -float(transaction.get('DebitCredit') or 0.0)
+
+
+class PerformanceAnalytics:
+    """
+    Time- and money-weighted returns, volatility and correlations of an account's
+    holdings, from its transactions and the historical prices of its instruments.
+
+    Transactions and prices are fetched through the client and cached for `ttl`
+    seconds. Every result is memoized until the data it was computed from is
+    fetched again, so repeated queries are dictionary lookups.
+
+    The portfolio is the account's holdings (not its cash), so buying and selling
+    shares are the cash flows.
+
+    Example::
+
+        analytics = PerformanceAnalytics(client, account.id)
+        analytics.time_weighted_return()
+        codes, matrix = analytics.correlation_matrix()
+    """
+
+    def __init__(
+        self,
+        client,
+        account_id: str,
+        period: Period = Period.MAX,
+        ttl: float = 300.0,
+        flow: Callable[[Transaction], float] = trade_flow,
+    ):
+        """
+        :param client: A logged in `EasyEquitiesClient` or `SatrixClient`.
+        :param period: Period of historical prices to fetch for each instrument.
+        :param ttl: Seconds to cache transactions and prices for.
+        :param flow: Returns the cash flow of a transaction into the holdings.
+        """
+        self.client = client
+        self.account_id = account_id
+        self.period = period
+        self.flow = flow
+        self.cache = TTLCache(ttl)
+        # {key: (inputs the result was computed from, result)}
+        self._memo: Dict[Hashable, Tuple[Tuple[Any, ...], Any]] = {}
+        self._valuation = PortfolioValuation()
+        self._seen_transactions: set = set()
+
+    def _memoize(
+        self, key: Hashable, inputs: Tuple[Any, ...], compute: Callable[[], Any]
+    ) -> Any:
+        """
+        Return the memoized result for a key if it was computed from the same input
+        objects, otherwise compute and memoize it.
+        """
+        entry = self._memo.get(key)
+        if (
+            entry is not None
+            and len(entry[0]) == len(inputs)
+            and all(a is b for a, b in zip(entry[0], inputs))
+        ):
+            return entry[1]
+        result = compute()
+        self._memo[key] = (inputs, result)
+        return result
+
+    def invalidate(self) -> None:
+        """
+        Fetch transactions and prices again on the next query.
+        """
+        self.cache.invalidate()
+
+    def transactions(self) -> List[Transaction]:
+        return self.cache.get_or_load(
+            "transactions", lambda: self.client.accounts.transactions(self.account_id)
+        )
+
+    def historical_prices(self, contract_code: str) -> HistoricalPrices:
+        return self.cache.get_or_load(
+            ("prices", contract_code),
+            lambda: self.client.instruments.historical_prices(
+                contract_code, self.period
+            ),
+        )
+
+    def _inputs(self) -> Tuple[Any, ...]:
+        """
+        The transactions and the prices of every instrument traded in them, i.e.
+        what every result is computed from.
+        """
+        transactions = self.transactions()
+        codes = self._memoize(
+            "contract_codes",
+            (transactions,),
+            lambda: sorted(
+                {t['ContractCode'] for t in transactions if t.get('ContractCode')}
+            ),
+        )
+        return (transactions, *(self.historical_prices(code) for code in codes))
+
+    def valuation(self) -> PortfolioValuation:
+        """
+        The account's daily holdings and value, updated with transactions and prices
+        fetched since the last call.
+        """
+        inputs = self._inputs()
+
+        def update() -> PortfolioValuation:
+            new = [
+                t
+                for t in inputs[0]
+                if (t.get('TransactionId'), t.get('LogId'))
+                not in self._seen_transactions
+            ]
+            self._valuation.add_transactions(new)
+            self._seen_transactions.update(
+                (t.get('TransactionId'), t.get('LogId')) for t in new
+            )
+            for code in self._valuation.contract_codes:
+                self._valuation.add_prices(code, self.historical_prices(code))
+            return self._valuation
+
+        return self._memoize("valuation", inputs, update)
+
+    def flows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the days of the valuation and the cash flow into the holdings on each
+        day.
+        """
+        inputs = self._inputs()
+
+        def compute() -> Tuple[np.ndarray, np.ndarray]:
+            dates = self.valuation().dates
+            flows = np.zeros(len(dates))
+            transactions = [t for t in inputs[0] if self.flow(t)]
+            if transactions and len(dates):
+                days = _days(
+                    parse_transaction_date(t['TransactionDate']) for t in transactions
+                )
+                rows = (days - dates[0]).astype(int)
+                np.add.at(flows, rows, [self.flow(t) for t in transactions])
+            return dates, flows
+
+        return self._memoize("flows", inputs, compute)
+
+    def _priced(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The days from the first day every held instrument has a price, with the
+        portfolio's values and flows on those days.
+        """
+        inputs = self._inputs()
+
+        def compute():
+            valuation = self.valuation()
+            dates, values = valuation.values()
+            _, flows = self.flows()
+            _, prices = valuation.prices()
+            _, holdings = valuation.holdings()
+            missing = (np.isnan(prices) & (holdings != 0)).any(axis=1)
+            start = int(np.flatnonzero(missing).max()) + 1 if missing.any() else 0
+            return dates[start:], values[start:], flows[start:]
+
+        return self._memoize("priced", inputs, compute)
+
+    def daily_returns(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the trading days and the portfolio's time-weighted return on each.
+        """
+        inputs = self._inputs()
+
+        def compute():
+            dates, values, flows = self._priced()
+            business = np.is_busday(dates)
+            # Fold weekend flows into the next trading day.
+            index = np.cumsum(business) - business
+            keep = index < business.sum()
+            trading_flows = np.zeros(int(business.sum()))
+            np.add.at(trading_flows, index[keep], flows[keep])
+            trading_dates = dates[business]
+            returns = time_weighted_returns(values[business], trading_flows)
+            return trading_dates[1:], returns
+
+        return self._memoize("daily_returns", inputs, compute)
+
+    def time_weighted_return(self) -> float:
+        return self._memoize(
+            "twr",
+            self._inputs(),
+            lambda: float(np.prod(1 + self.daily_returns()[1]) - 1),
+        )
+
+    def money_weighted_return(self) -> float:
+        """
+        Annualised money-weighted return (XIRR) of the holdings.
+        """
+
+        def compute():
+            dates, values, flows = self._priced()
+            if not len(dates):
+                return float("nan")
+            # The value on the first priced day counts as money put in.
+            flows = flows.copy()
+            flows[0] = values[0]
+            days = np.flatnonzero(flows)
+            return money_weighted_return(
+                dates[days].astype(object),
+                flows[days],
+                float(values[-1]),
+                dates[-1].astype(object),
+            )
+
+        return self._memoize("mwr", self._inputs(), compute)
+
+    def volatility(self) -> float:
+        """
+        Annualised volatility of the portfolio's daily time-weighted returns.
+        """
+        return self._memoize(
+            "volatility",
+            self._inputs(),
+            lambda: float(
+                np.std(self.daily_returns()[1], ddof=1)
+                * np.sqrt(TRADING_DAYS_PER_YEAR)
+            ),
+        )
+
+    def held_contract_codes(self) -> List[str]:
+        """
+        Contract codes of the instruments currently held.
+        """
+
+        def compute():
+            valuation = self.valuation()
+            _, holdings = valuation.holdings()
+            if not len(holdings):
+                return []
+            return [
+                code
+                for code, quantity in zip(valuation.contract_codes, holdings[-1])
+                if quantity > 0
+            ]
+
+        return self._memoize("held", self._inputs(), compute)
+
+    def instrument_volatility(self) -> Dict[str, float]:
+        """
+        Annualised volatility of each held instrument's prices.
+        """
+        codes = self.held_contract_codes()
+        prices = [self.historical_prices(code) for code in codes]
+        return self._memoize(
+            "instrument_volatility",
+            tuple(prices),
+            lambda: {
+                code: float(volatility(price['chartData']['Dataset']))
+                for code, price in zip(codes, prices)
+            },
+        )
+
+    def correlation_matrix(
+        self, contract_codes: Optional[List[str]] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        Return contract codes and the correlation matrix of their daily returns, in
+        the order of the codes. Defaults to the instruments currently held.
+        """
+        codes = contract_codes or self.held_contract_codes()
+        inputs = self._inputs()
+
+        def compute():
+            valuation = self.valuation()
+            if not codes:
+                return codes, np.zeros((0, 0))
+            dates, prices = valuation.prices()
+            columns = [valuation.contract_codes.index(code) for code in codes]
+            return codes, correlation_matrix(prices[np.is_busday(dates)][:, columns])
+
+        return self._memoize(("correlation", tuple(codes)), inputs, compute)
@@ -0,0 +1,261 @@
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "easy_equities_client.analytics requires numpy: "
+        "pip install easy-equities-client[analytics]"
+    ) from e
+
+from easy_equities_client.accounts.types import Transaction
+from easy_equities_client.instruments.types import HistoricalPrices
+
+# Chart labels look like "25 Jun 21".
+LABEL_DATE_FORMATS = ("%d %b %y", "%d %b %Y", "%Y-%m-%d", "%Y/%m/%d")
+
+# e.g. "Bought 10 @ 15.00", "Sold 2.5 @ 20.00"
+_TRADE = re.compile(r"\b(bought|sold)\s+([\d\s,]*\.?\d+)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class PositionChange:
+    date: date
+    contract_code: str
+    quantity: float
+
+
+def parse_label_date(label: str) -> date:
+    """
+    Parse the date of a historical prices chart label, e.g. "25 Jun 21".
+    """
+    for date_format in LABEL_DATE_FORMATS:
+        try:
+            return datetime.strptime(label.strip(), date_format).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Unknown chart label date format: {label!r}")
+
+
+def parse_transaction_date(value: str) -> date:
+    """
+    Parse a transaction's date, e.g. "2020-07-21T01:00:00".
+    """
+    return date.fromisoformat(value[:10])
+
+
+def transaction_quantity(transaction: Transaction) -> float:
+    """
+    Return the number of shares a transaction bought (positive) or sold (negative),
+    read from its comment, or 0 for transactions that don't trade shares.
+    """
+    match = _TRADE.search(transaction.get('Comment') or "")
+    if not match:
+        return 0.0
+    quantity = float(re.sub(r"[\s,]", "", match.group(2)))
+    return quantity if match.group(1).lower() == "bought" else -quantity
+
+
+def position_changes(
+    transactions: Iterable[Transaction],
+    quantity: Callable[[Transaction], float] = transaction_quantity,
+) -> List[PositionChange]:
+    """
+    Turn transactions into position changes by contract code.
+
+    :param quantity: Returns the change in shares of a transaction. Defaults to
+    reading "Bought"/"Sold" quantities from the transaction's comment.
+    """
+    changes = []
+    for transaction in transactions:
+        code = transaction.get('ContractCode')
+        change = quantity(transaction) if code else 0.0
+        if change:
+            changes.append(
+                PositionChange(
+                    parse_transaction_date(transaction['TransactionDate']), code, change
+                )
+            )
+    return changes
+
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def _days(dates: Iterable[date]) -> np.ndarray:
+    # Much faster than np.array(dates, dtype="datetime64[D]") for date objects.
+    ordinals = np.fromiter((d.toordinal() for d in dates), dtype=np.int64)
+    return (ordinals - _EPOCH).astype("datetime64[D]")
+
+
+class PortfolioValuation:
+    """
+    Reconstruct daily holdings and portfolio value from position changes (from
+    `transactions()`) and instrument prices (from `historical_prices`).
+
+    Holdings are the cumulative sums of each instrument's daily position changes and
+    prices are carried forward from the last known price, both as day x instrument
+    arrays. Adding transactions or prices only recomputes the days from the earliest
+    affected day onwards.
+
+    Example::
+
+        valuation = PortfolioValuation()
+        valuation.add_transactions(client.accounts.transactions(account.id))
+        for code in valuation.contract_codes:
+            prices = client.instruments.historical_prices(code, Period.MAX)
+            valuation.add_prices(code, prices)
+        dates, values = valuation.values()
+    """
+
+    def __init__(self):
+        self.contract_codes: List[str] = []
+        self._columns: Dict[str, int] = {}
+        self._start: Optional[np.datetime64] = None
+        self._deltas = np.zeros((0, 0))
+        self._raw_prices = np.zeros((0, 0))
+        self._quantities = np.zeros((0, 0))
+        self._prices = np.zeros((0, 0))
+        self._values = np.zeros(0)
+        # First day index that needs to be recomputed, None if up to date
+        self._dirty: Optional[int] = None
+
+    @property
+    def dates(self) -> np.ndarray:
+        if self._start is None:
+            return _days([])
+        return self._start + np.arange(self._deltas.shape[0])
+
+    def _mark_dirty(self, index: int) -> None:
+        self._dirty = index if self._dirty is None else min(self._dirty, index)
+
+    def _column(self, contract_code: str) -> int:
+        if contract_code not in self._columns:
+            self._columns[contract_code] = len(self.contract_codes)
+            self.contract_codes.append(contract_code)
+            rows = self._deltas.shape[0]
+            self._deltas = np.hstack([self._deltas, np.zeros((rows, 1))])
+            self._raw_prices = np.hstack([self._raw_prices, np.full((rows, 1), np.nan)])
+            self._quantities = np.hstack([self._quantities, np.zeros((rows, 1))])
+            self._prices = np.hstack([self._prices, np.full((rows, 1), np.nan)])
+        return self._columns[contract_code]
+
+    def _day_indices(self, days: np.ndarray) -> np.ndarray:
+        """
+        Extend the day axis to cover the given days and return their row indices.
+        """
+        first, last = days.min(), days.max()
+        if self._start is None:
+            self._start = first
+        if first < self._start:
+            extra = int((self._start - first).astype(int))
+            columns = self._deltas.shape[1]
+            self._deltas = np.vstack([np.zeros((extra, columns)), self._deltas])
+            self._raw_prices = np.vstack(
+                [np.full((extra, columns), np.nan), self._raw_prices]
+            )
+            self._quantities = np.vstack([np.zeros((extra, columns)), self._quantities])
+            self._prices = np.vstack([np.full((extra, columns), np.nan), self._prices])
+            self._values = np.concatenate([np.zeros(extra), self._values])
+            self._start = first
+            self._dirty = 0
+        end = int((last - self._start).astype(int)) + 1
+        rows = self._deltas.shape[0]
+        if end > rows:
+            extra = end - rows
+            columns = self._deltas.shape[1]
+            self._deltas = np.vstack([self._deltas, np.zeros((extra, columns))])
+            self._raw_prices = np.vstack(
+                [self._raw_prices, np.full((extra, columns), np.nan)]
+            )
+            self._quantities = np.vstack([self._quantities, np.zeros((extra, columns))])
+            self._prices = np.vstack([self._prices, np.full((extra, columns), np.nan)])
+            self._values = np.concatenate([self._values, np.zeros(extra)])
+            self._mark_dirty(rows)
+        return (days - self._start).astype(int)
+
+    def add_position_changes(self, changes: Sequence[PositionChange]) -> None:
+        if not changes:
+            return
+        columns = np.array([self._column(change.contract_code) for change in changes])
+        rows = self._day_indices(_days(change.date for change in changes))
+        quantities = np.array([change.quantity for change in changes], dtype=float)
+        np.add.at(self._deltas, (rows, columns), quantities)
+        self._mark_dirty(int(rows.min()))
+
+    def add_transactions(
+        self,
+        transactions: Iterable[Transaction],
+        quantity: Callable[[Transaction], float] = transaction_quantity,
+    ) -> None:
+        self.add_position_changes(position_changes(transactions, quantity))
+
+    def add_price_series(
+        self, contract_code: str, dates: Sequence[date], prices: Sequence[float]
+    ) -> None:
+        """
+        Add prices of an instrument. Prices for days that already have a price
+        replace them.
+        """
+        if not len(dates):
+            return
+        column = self._column(contract_code)
+        rows = self._day_indices(_days(dates))
+        self._raw_prices[rows, column] = np.asarray(prices, dtype=float)
+        self._mark_dirty(int(rows.min()))
+
+    def add_prices(self, contract_code: str, prices: HistoricalPrices) -> None:
+        chart = prices['chartData']
+        self.add_price_series(
+            contract_code,
+            [parse_label_date(label) for label in chart['Labels']],
+            chart['Dataset'],
+        )
+
+    def _update(self) -> None:
+        start = self._dirty
+        if start is None:
+            return
+        # Holdings: carry on from the day before the first changed day.
+        previous = self._quantities[start - 1] if start else 0.0
+        self._quantities[start:] = previous + np.cumsum(self._deltas[start:], axis=0)
+        # Prices: forward fill by taking each cell's last row with a known price.
+        raw = self._raw_prices[start:]
+        if start:
+            raw = np.vstack([self._prices[start - 1 : start], raw])
+        known = ~np.isnan(raw)
+        last_known = np.where(known, np.arange(raw.shape[0])[:, None], 0)
+        np.maximum.accumulate(last_known, axis=0, out=last_known)
+        filled = raw[last_known, np.arange(raw.shape[1])]
+        self._prices[start:] = filled[1:] if start else filled
+        # Instruments without a price yet don't count towards the value.
+        self._values[start:] = np.nansum(
+            self._quantities[start:] * self._prices[start:], axis=1
+        )
+        self._dirty = None
+
+    def holdings(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the days and the number of shares held per day (rows) and instrument
+        (columns, in the order of `contract_codes`).
+        """
+        self._update()
+        return self.dates, self._quantities.copy()
+
+    def prices(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the days and the price of each instrument per day, carried forward
+        from the last known price (NaN before the first known price).
+        """
+        self._update()
+        return self.dates, self._prices.copy()
+
+    def values(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the days and the portfolio's value on each day.
+        """
+        self._update()
+        return self.dates, self._values.copy()
@@ -1,11 +1,20 @@
+import threading
 import urllib.parse
+from typing import TYPE_CHECKING, Optional, Tuple
 
 from requests import Session
 
 from easy_equities_client import constants
 from easy_equities_client.accounts.clients import AccountsClient
+from easy_equities_client.accounts.detail_cache import HoldingDetailCache
 from easy_equities_client.instruments.clients import InstrumentsClient
+from easy_equities_client.instruments.index import InstrumentIndex
 from easy_equities_client.types import Client
+from easy_equities_client.utils.bandwidth import ACCEPT_ENCODING, BandwidthMeter
+from easy_equities_client.utils.resilience import CircuitBreakers
+
+if TYPE_CHECKING:
+    from easy_equities_client.accounts.parse_pool import ParsePool
 
 
 class PlatformClient(Client):
@@ -14,21 +23,91 @@ class PlatformClient(Client):
     and https://platform.satrixnow.co.za.
     """
 
-    def __init__(self, base_url, session: Session = None):
-        super().__init__(base_url, session)
-        self.accounts = AccountsClient(base_url, self.session)
-        self.instruments = InstrumentsClient(base_url, self.session)
-
-    def login(self, username: str, password: str) -> bool:
+    def __init__(
+        self,
+        base_url,
+        session: Session = None,
+        instrument_index: InstrumentIndex = None,
+        detail_cache: HoldingDetailCache = None,
+        parse_pool: "ParsePool" = None,
+        circuit_breakers: CircuitBreakers = None,
+        bandwidth: BandwidthMeter = None,
+    ):
+        # Circuit breakers and bandwidth per endpoint, shared by the accounts and
+        # instruments clients.
+        super().__init__(base_url, session, circuit_breakers, bandwidth)
+        # Sent with every request. Compressed responses are decoded as they're read.
+        self.session.headers["Accept"] = (
+            "text/html,application/xhtml+xml,"
+            "application/xml;q=0.9,image/webp,*/*;q=0.8"
+        )
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        # Instruments seen on holdings pages, shared by the accounts and instruments clients.
+        self.instrument_index = (
+            InstrumentIndex() if instrument_index is None else instrument_index
+        )
+        # Holding detail pages (share counts), kept until a holding is traded.
+        self.detail_cache = (
+            HoldingDetailCache() if detail_cache is None else detail_cache
+        )
+        self._accounts = AccountsClient(
+            base_url,
+            self.session,
+            self.instrument_index,
+            self.detail_cache,
+            parse_pool,
+            self.circuit_breakers,
+            self.bandwidth,
+        )
+        self._instruments = InstrumentsClient(
+            base_url,
+            self.session,
+            self.instrument_index,
+            self.circuit_breakers,
+            self.bandwidth,
+            self._ensure_logged_in,
+        )
+        self._pending_login: Optional[Tuple[str, str]] = None
+        self._login_lock = threading.Lock()
+
+    @property
+    def accounts(self) -> AccountsClient:
+        self._ensure_logged_in()
+        return self._accounts
+
+    @property
+    def instruments(self) -> InstrumentsClient:
+        # Logs in on its first request, so that lookups stay offline.
+        return self._instruments
+
+    def _ensure_logged_in(self) -> None:
+        if self._pending_login is None:
+            return
+        with self._login_lock:
+            if self._pending_login is not None:
+                self._login(*self._pending_login)
+                self._pending_login = None
+
+    def login(self, username: str, password: str, lazy: bool = False) -> bool:
         """
         Login to the platform.
 
         :param username: Username.
         :param password: Password.
+        :param lazy: Defer logging in until the accounts client or a request of the
+        instruments client is first used, so that work which never reaches the platform
+        doesn't pay for it. Instrument lookups never log in.
 
-        :return: boolean True if successfully logged in.
+        :return: boolean True if successfully logged in (or deferred).
         :raises Exception: if request failed.
         """
+        if lazy:
+            self._pending_login = (username, password)
+            return True
+        self._pending_login = None
+        return self._login(username, password)
+
+    def _login(self, username: str, password: str) -> bool:
         password = urllib.parse.quote(password)
         username = urllib.parse.quote(username)
 
@@ -36,17 +115,13 @@ class PlatformClient(Client):
             f"UserIdentifier={username}&Password={password}"
             "&ReturnUrl=&OneSignalGameId=&IsUsingNewLayoutSatrixOrEasyEquitiesMobileApp=False"
         )
-        self.session.headers["Accept"] = (
-            "text/html,application/xhtml+xml,"
-            "application/xml;q=0.9,image/webp,*/*;q=0.8"
-        )
-        self.session.headers["Connection"] = "keep-alive"
-        self.session.headers["Connection-Type"] = "application/x-www-form-urlencoded"
-        self.session.headers["Content-Type"] = "application/x-www-form-urlencoded"
-
-        response = self.session.post(
-            self._url(constants.PLATFORM_SIGN_IN_PATH),
+        # Only the sign in form is form encoded, so its headers aren't kept on the
+        # session.
+        response = self._request(
+            "POST",
+            constants.PLATFORM_SIGN_IN_PATH,
             data=data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
             allow_redirects=False,
         )
         response.raise_for_status()
@@ -61,8 +136,25 @@ class EasyEquitiesClient(PlatformClient):
     Client to interact with EasyEquities.
     """
 
-    def __init__(self, base_url: str = constants.EASY_EQUITIES_BASE_PLATFORM_URL):
-        return super().__init__(base_url)
+    def __init__(
+        self,
+        base_url: str = constants.EASY_EQUITIES_BASE_PLATFORM_URL,
+        session: Session = None,
+        instrument_index: InstrumentIndex = None,
+        detail_cache: HoldingDetailCache = None,
+        parse_pool: "ParsePool" = None,
+        circuit_breakers: CircuitBreakers = None,
+        bandwidth: BandwidthMeter = None,
+    ):
+        return super().__init__(
+            base_url,
+            session,
+            instrument_index,
+            detail_cache,
+            parse_pool,
+            circuit_breakers,
+            bandwidth,
+        )
 
 
 class SatrixClient(PlatformClient):
@@ -70,5 +162,22 @@ class SatrixClient(PlatformClient):
     Client to interact with Satrix.
     """
 
-    def __init__(self, base_url: str = constants.SATRIX_BASE_PLATFORM_URL):
-        return super().__init__(base_url)
+    def __init__(
+        self,
+        base_url: str = constants.SATRIX_BASE_PLATFORM_URL,
+        session: Session = None,
+        instrument_index: InstrumentIndex = None,
+        detail_cache: HoldingDetailCache = None,
+        parse_pool: "ParsePool" = None,
+        circuit_breakers: CircuitBreakers = None,
+        bandwidth: BandwidthMeter = None,
+    ):
+        return super().__init__(
+            base_url,
+            session,
+            instrument_index,
+            detail_cache,
+            parse_pool,
+            circuit_breakers,
+            bandwidth,
+        )
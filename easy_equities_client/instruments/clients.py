@@ -1,21 +1,61 @@
+from typing import Callable, Optional, Union
+
+from requests import Session
+
 from easy_equities_client import constants
+from easy_equities_client.instruments.index import Instrument, InstrumentIndex
 from easy_equities_client.instruments.types import HistoricalPrices, Period
 from easy_equities_client.types import Client
+from easy_equities_client.utils.bandwidth import BandwidthMeter
+from easy_equities_client.utils.resilience import CircuitBreakers, Deadline
 
 
 class InstrumentsClient(Client):
-    def historical_prices(self, contract_code: str, period: Period) -> HistoricalPrices:
+    def __init__(
+        self,
+        base_url: str = "",
+        session: Session = None,
+        instrument_index: InstrumentIndex = None,
+        circuit_breakers: CircuitBreakers = None,
+        bandwidth: BandwidthMeter = None,
+        ensure_logged_in: Callable[[], None] = None,
+    ):
+        super().__init__(base_url, session, circuit_breakers, bandwidth)
+        self.instrument_index = (
+            InstrumentIndex() if instrument_index is None else instrument_index
+        )
+        # Called before each request, to finish a lazy login. Lookups never log in.
+        self._ensure_logged_in = ensure_logged_in
+
+    def lookup(self, key: str) -> Optional[Instrument]:
+        """
+        Look up an instrument seen in any holdings by contract code, ISIN or name,
+        without making a request.
+
+        @param key: Contract code, ISIN or name, e.g. "EQU.ZA.SYGJP"
+        """
+        return self.instrument_index.get(key)
+
+    def historical_prices(
+        self,
+        contract_code: str,
+        period: Period,
+        deadline: Union[Deadline, float, None] = None,
+    ) -> HistoricalPrices:
         """
         Fetch the historical prices of a given instrument.
 
         @param contract_code: Contract code for the instrument, e.g. "EQU.ZA.SYGJP"
         @param period: Time period for which to fetch the historical data.
+        @param deadline: Seconds (or a shared `Deadline`) to finish within.
         """
-        response = self.session.get(
-            self._url(
-                constants.PLATFORM_GET_CHART_DATA_PATH,
-                f"code={contract_code}&period={period.value}",
-            )
+        if self._ensure_logged_in is not None:
+            self._ensure_logged_in()
+        response = self._request(
+            "GET",
+            constants.PLATFORM_GET_CHART_DATA_PATH,
+            f"code={contract_code}&period={period.value}",
+            deadline=Deadline.of(deadline),
         )
         assert (
             response.status_code == 200
@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, Iterable, Iterator, Optional
+
+from easy_equities_client.accounts.types import Holding
+
+
+@dataclass
+class Instrument:
+    contract_code: str
+    isin: str = ""
+    name: str = ""
+    img: str = ""
+    view_url: str = ""
+
+
+_FIELDS = [f.name for f in fields(Instrument)]
+
+
+class InstrumentIndex:
+    """
+    Instrument metadata (contract code, ISIN, name, logo and detail page URL) seen on
+    holdings pages, with constant time lookup by contract code, ISIN or name.
+
+    Only holdings pages identify instruments: holding detail pages are only parsed
+    for share counts, and the ISIN in their URL comes from the holdings page.
+
+    The index can be saved to and loaded from a JSON file so that it persists
+    between runs.
+
+    Example::
+
+        index = InstrumentIndex("instruments.json")
+        client = EasyEquitiesClient(instrument_index=index)
+        ...
+        client.accounts.holdings(account.id)  # adds the account's instruments
+        index.save()
+        index.get("ZAE000254249")
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        :param path: JSON file to load the index from, if it exists, and save it to.
+        """
+        self.path = path
+        self._by_contract_code: Dict[str, Instrument] = {}
+        self._by_isin: Dict[str, Instrument] = {}
+        self._by_name: Dict[str, Instrument] = {}
+        self._instruments: Dict[int, Instrument] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def add(self, instrument: Instrument) -> Instrument:
+        """
+        Add an instrument, or update the indexed instrument with the same contract
+        code (or ISIN) with the fields that are set.
+
+        If the ISIN belongs to an indexed instrument with a different contract code,
+        the ISIN is moved to this instrument. If it belongs to one without a contract
+        code, that instrument is merged into this one.
+        """
+        with self._lock:
+            existing = self._by_contract_code.get(instrument.contract_code)
+            other = self._by_isin.get(instrument.isin)
+            if other is not None and other is not existing:
+                self._unindex(other)
+                if instrument.contract_code and other.contract_code:
+                    # Another listing had this ISIN, e.g. before a code change.
+                    other.isin = ""
+                    self._index(other)
+                elif existing is None:
+                    existing = other
+                else:
+                    # The same instrument, seen without its contract code
+                    for field in _FIELDS:
+                        if not getattr(existing, field):
+                            setattr(existing, field, getattr(other, field))
+                    del self._instruments[id(other)]
+            if existing is None:
+                existing = instrument
+            else:
+                self._unindex(existing)
+                for field in _FIELDS:
+                    value = getattr(instrument, field)
+                    if value:
+                        setattr(existing, field, value)
+            self._index(existing)
+            return existing
+
+    def _index(self, instrument: Instrument) -> None:
+        self._instruments[id(instrument)] = instrument
+        if instrument.contract_code:
+            self._by_contract_code[instrument.contract_code] = instrument
+        if instrument.isin:
+            self._by_isin[instrument.isin] = instrument
+        if instrument.name:
+            self._by_name[instrument.name.casefold()] = instrument
+
+    def _unindex(self, instrument: Instrument) -> None:
+        for keys, key in (
+            (self._by_contract_code, instrument.contract_code),
+            (self._by_isin, instrument.isin),
+            (self._by_name, instrument.name.casefold()),
+        ):
+            # Another instrument may have the same name.
+            if keys.get(key) is instrument:
+                del keys[key]
+
+    def add_holdings(self, holdings: Iterable[Holding]) -> None:
+        for holding in holdings:
+            if holding.get('contract_code') or holding.get('isin'):
+                self.add(
+                    Instrument(
+                        **{field: holding.get(field, "") for field in _FIELDS}  # type: ignore
+                    )
+                )
+
+    def by_contract_code(self, contract_code: str) -> Optional[Instrument]:
+        return self._by_contract_code.get(contract_code)
+
+    def by_isin(self, isin: str) -> Optional[Instrument]:
+        return self._by_isin.get(isin)
+
+    def by_name(self, name: str) -> Optional[Instrument]:
+        """
+        Case-insensitive lookup by the instrument's full name.
+        """
+        return self._by_name.get(name.casefold())
+
+    def get(self, key: str) -> Optional[Instrument]:
+        """
+        Look up an instrument by contract code, ISIN or name.
+        """
+        return self.by_contract_code(key) or self.by_isin(key) or self.by_name(key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._instruments)
+
+    def __iter__(self) -> Iterator[Instrument]:
+        return iter(list(self._instruments.values()))
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path:
+            raise ValueError("No path to save the instrument index to.")
+        with self._lock:
+            instruments = [asdict(instrument) for instrument in self]
+        with open(path, "w") as f:
+            json.dump(instruments, f)
+
+    def load(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path:
+            raise ValueError("No path to load the instrument index from.")
+        with open(path) as f:
+            for instrument in json.load(f):
+                self.add(Instrument(**instrument))
@@ -0,0 +1,317 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from datetime import time as clock_time
+from datetime import timedelta, timezone
+from typing import Callable, Collection, Dict, List, Optional
+
+from easy_equities_client.instruments.types import HistoricalPrices, Period
+from easy_equities_client.scheduler import PollingLoop
+
+logger = logging.getLogger(__name__)
+
+SAST = timezone(timedelta(hours=2), "SAST")
+
+
+class MarketHours:
+    """
+    Trading hours of an exchange, by default the JSE: weekdays from 09:00 to 17:00
+    South African time.
+    """
+
+    def __init__(
+        self,
+        opens: clock_time = clock_time(9, 0),
+        closes: clock_time = clock_time(17, 0),
+        tz: timezone = SAST,
+        holidays: Collection = (),
+    ):
+        """
+        :param holidays: Dates (`datetime.date`) on which the exchange is closed.
+        """
+        self.opens = opens
+        self.closes = closes
+        self.tz = tz
+        self.holidays = set(holidays)
+
+    def _is_trading_day(self, day) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def is_open(self, when: Optional[datetime] = None) -> bool:
+        now = (when or datetime.now(self.tz)).astimezone(self.tz)
+        return (
+            self._is_trading_day(now.date()) and self.opens <= now.time() < self.closes
+        )
+
+    def seconds_until_open(self, when: Optional[datetime] = None) -> float:
+        """
+        Seconds until the market next opens, or 0 if it's open.
+        """
+        now = (when or datetime.now(self.tz)).astimezone(self.tz)
+        if self.is_open(now):
+            return 0.0
+        day = now.date()
+        if now.time() >= self.opens:
+            day += timedelta(days=1)
+        while not self._is_trading_day(day):
+            day += timedelta(days=1)
+        opens = datetime.combine(day, self.opens, tzinfo=self.tz)
+        return (opens - now).total_seconds()
+
+
+@dataclass(frozen=True)
+class PriceUpdate:
+    contract_code: str
+    price: float
+    previous_price: Optional[float]
+    # As reported by the platform, e.g. the change since the previous close
+    daily_change: float
+    # Chart label of the price's day, e.g. "25 Jun 21"
+    label: str
+    updated_at: float
+
+
+@dataclass
+class _Tracked:
+    interval: float
+    next_poll: float = 0.0
+    latest: Optional[PriceUpdate] = None
+    # Moving average of the absolute relative price change per poll
+    volatility: float = 0.0
+    failures: int = 0
+    listeners: List[Callable[[PriceUpdate], None]] = field(default_factory=list)
+
+
+PriceListener = Callable[[PriceUpdate], None]
+
+
+class PriceWatcher:
+    """
+    Watch the latest prices of many instruments with as few requests as possible for
+    a given freshness.
+
+    Every instrument has its own polling interval, starting at `freshness`: it halves
+    (down to `min_interval`) each time the price changes or while the price is
+    volatile, and grows by half (up to `max_interval`) each time it doesn't. While
+    the market is closed instruments are polled every `closed_interval` at most, and
+    again when it opens. Instruments that are due around the same time are polled
+    together in one batch, and listeners are only called when a price changes.
+
+    The platform only serves prices as chart data, so each poll fetches the
+    instrument's shortest chart (`Period.ONE_MONTH`) and reads its last point.
+
+    Example::
+
+        watcher = PriceWatcher(client, freshness=60)
+        watcher.add_listener(lambda update: print(update.contract_code, update.price))
+        watcher.watch("EQU.ZA.SYGJP")
+        watcher.watch("EQU.ZA.STX40")
+        watcher.start()
+    """
+
+    def __init__(
+        self,
+        client,
+        freshness: float = 60.0,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        closed_interval: float = 3600.0,
+        market_hours: Optional[MarketHours] = None,
+        volatile_change: float = 0.005,
+        max_workers: int = 4,
+        period: Period = Period.ONE_MONTH,
+    ):
+        """
+        :param client: Logged in platform client.
+        :param freshness: Target seconds between a price change and its update.
+        :param min_interval: Shortest polling interval, defaults to freshness / 4.
+        :param max_interval: Longest polling interval while the market is open,
+        defaults to freshness * 4.
+        :param closed_interval: Longest polling interval while the market is closed.
+        :param market_hours: Defaults to JSE trading hours.
+        :param volatile_change: Average relative change per poll (e.g. 0.005 for 0.5%)
+        above which an instrument is polled at `min_interval`.
+        :param max_workers: Number of instruments fetched concurrently in a batch.
+        """
+        self.client = client
+        self.freshness = freshness
+        self.min_interval = min_interval or freshness / 4
+        self.max_interval = max_interval or freshness * 4
+        self.closed_interval = closed_interval
+        self.market_hours = market_hours or MarketHours()
+        self.volatile_change = volatile_change
+        self.period = period
+        self.requests = 0
+        self._tracked: Dict[str, _Tracked] = {}
+        self._listeners: List[PriceListener] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="easy-equities-prices"
+        )
+        self._poller = PollingLoop(self.poll_due, "easy-equities-price-watcher")
+
+    def watch(
+        self, contract_code: str, listener: Optional[PriceListener] = None
+    ) -> None:
+        """
+        Start watching an instrument. It's polled on the watcher's next cycle.
+
+        :param listener: Called with the instrument's updates, in addition to the
+        watcher's listeners.
+        """
+        with self._lock:
+            tracked = self._tracked.setdefault(
+                contract_code, _Tracked(interval=self.freshness)
+            )
+            if listener is not None:
+                tracked.listeners.append(listener)
+        self._poller.wake()
+
+    def unwatch(self, contract_code: str) -> None:
+        with self._lock:
+            self._tracked.pop(contract_code, None)
+
+    def add_listener(self, listener: PriceListener) -> None:
+        """
+        Call ``listener(update)`` from the polling thread with the first price of
+        every instrument and whenever a price changes.
+        """
+        self._listeners.append(listener)
+
+    def price(self, contract_code: str) -> Optional[PriceUpdate]:
+        """
+        Return the latest price of an instrument without blocking, or None if it
+        hasn't been polled yet.
+        """
+        with self._lock:
+            tracked = self._tracked.get(contract_code)
+            return tracked.latest if tracked else None
+
+    def interval(self, contract_code: str) -> float:
+        """
+        Return the current polling interval of an instrument.
+        """
+        return self._tracked[contract_code].interval
+
+    def _fetch(self, contract_code: str) -> HistoricalPrices:
+        with self._lock:
+            self.requests += 1
+        return self.client.instruments.historical_prices(
+            contract_code, self.period, deadline=self.max_interval
+        )
+
+    def _next_interval(self, tracked: _Tracked, changed: bool) -> float:
+        if tracked.volatility >= self.volatile_change:
+            return self.min_interval
+        if changed:
+            return max(self.min_interval, tracked.interval / 2)
+        return min(self.max_interval, tracked.interval * 1.5)
+
+    def _update(
+        self, contract_code: str, prices: HistoricalPrices
+    ) -> Optional[PriceUpdate]:
+        """
+        Record a poll's result and adapt the instrument's polling interval. Return
+        the update if the price is new or changed.
+        """
+        chart = prices['chartData']
+        if not chart.get('Dataset'):
+            raise ValueError(f"No chart data for {contract_code}")
+        price = float(chart['Dataset'][-1])
+        with self._lock:
+            tracked = self._tracked.get(contract_code)
+            if tracked is None:
+                return None
+            previous = tracked.latest.price if tracked.latest else None
+            changed = previous is not None and price != previous
+            if previous:
+                change = abs(price / previous - 1)
+                tracked.volatility = 0.7 * tracked.volatility + 0.3 * change
+            tracked.failures = 0
+            if previous is not None:
+                tracked.interval = self._next_interval(tracked, changed)
+            tracked.latest = PriceUpdate(
+                contract_code=contract_code,
+                price=price,
+                previous_price=previous,
+                daily_change=chart.get('DailyChange', 0.0),
+                label=chart['Labels'][-1] if chart.get('Labels') else "",
+                updated_at=time.time(),
+            )
+            return tracked.latest if previous is None or changed else None
+
+    def _schedule(self, tracked: _Tracked, now: float) -> None:
+        if self.market_hours.is_open():
+            tracked.next_poll = now + tracked.interval
+        else:
+            wait = self.market_hours.seconds_until_open()
+            wait = max(wait, self.min_interval)
+            tracked.next_poll = now + min(self.closed_interval, wait)
+
+    def poll_due(self) -> float:
+        """
+        Poll every instrument that is due, or will be within `min_interval` / 2, in
+        one batch. Return the number of seconds until the next instrument is due.
+        """
+        now = time.monotonic()
+        window = now + self.min_interval / 2
+        with self._lock:
+            due = [
+                code
+                for code, tracked in self._tracked.items()
+                if tracked.next_poll <= window
+            ]
+        futures = [(code, self._executor.submit(self._fetch, code)) for code in due]
+        for code, future in futures:
+            try:
+                update = self._update(code, future.result())
+            except Exception as e:
+                logger.warning("Polling the price of %s failed: %s", code, e)
+                update = None
+                with self._lock:
+                    tracked = self._tracked.get(code)
+                    if tracked is not None:
+                        tracked.failures += 1
+                        tracked.interval = min(
+                            self.closed_interval, tracked.interval * 2
+                        )
+            with self._lock:
+                tracked = self._tracked.get(code)
+                if tracked is None:
+                    continue
+                self._schedule(tracked, time.monotonic())
+                listeners = self._listeners + tracked.listeners
+            if update is not None:
+                for listener in listeners:
+                    try:
+                        listener(update)
+                    except Exception:
+                        logger.exception("Price listener failed for %s", code)
+        with self._lock:
+            next_polls = [tracked.next_poll for tracked in self._tracked.values()]
+        if not next_polls:
+            return self.freshness
+        return max(0.0, min(next_polls) - time.monotonic())
+
+    def start(self) -> None:
+        """
+        Start polling in a daemon thread.
+        """
+        self._poller.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._poller.stop(timeout)
+
+    def close(self) -> None:
+        self.stop()
+        self._executor.shutdown()
+
+    async def run(self) -> None:
+        """
+        Poll in an asyncio task instead of a thread, e.g.
+        ``asyncio.create_task(watcher.run())``. Cancel the task or call `stop` to stop.
+        """
+        await self._poller.run()
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+from easy_equities_client.clients import EasyEquitiesClient, PlatformClient
+
+
+@dataclass
+class _PooledClient:
+    client: PlatformClient
+    last_used: float
+    authenticated: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ClientPool:
+    """
+    Manage authenticated platform clients for many users from one process.
+
+    All clients share a single connection pool, so the number of open connections
+    to the platform is capped at ``max_connections`` no matter how many users are
+    being served. Clients are logged in lazily on first use and the least recently
+    used clients are evicted once ``max_clients`` is exceeded or after being idle
+    for ``idle_timeout`` seconds. Evicted users keep their credentials and are
+    simply logged in again the next time they are requested.
+
+    Example::
+
+        pool = ClientPool(max_clients=200)
+        pool.add("alice", username="alice@example.com", password="...")
+        accounts = pool.get("alice").accounts.list()
+    """
+
+    def __init__(
+        self,
+        client_class: Callable[..., PlatformClient] = EasyEquitiesClient,
+        max_clients: int = 100,
+        max_connections: int = 10,
+        idle_timeout: Optional[float] = None,
+    ):
+        """
+        :param client_class: Platform client to create per user, e.g. SatrixClient.
+        :param max_clients: Maximum number of logged in clients to keep.
+        :param max_connections: Maximum number of open connections shared by all clients.
+        :param idle_timeout: Seconds after which an unused client is evicted.
+        """
+        self.client_class = client_class
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_connections, pool_block=True
+        )
+        self._credentials: Dict[Hashable, Tuple[str, str]] = {}
+        self._clients: "OrderedDict[Hashable, _PooledClient]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _new_session(self) -> Session:
+        session = Session()
+        session.mount("https://", self.adapter)
+        session.mount("http://", self.adapter)
+        return session
+
+    def add(self, key: Hashable, username: str, password: str) -> None:
+        """
+        Register a user's credentials. No request is made until the user's client
+        is first requested.
+
+        :param key: Key identifying the user in the pool.
+        :param username: Username.
+        :param password: Password.
+        """
+        with self._lock:
+            if self._credentials.get(key) != (username, password):
+                self._clients.pop(key, None)
+            self._credentials[key] = (username, password)
+
+    def remove(self, key: Hashable) -> None:
+        """
+        Forget a user's credentials and drop their client.
+        """
+        with self._lock:
+            self._credentials.pop(key, None)
+            self._clients.pop(key, None)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Mark a user's session as expired so that the next `get` logs in again.
+        """
+        with self._lock:
+            pooled = self._clients.get(key)
+            if pooled:
+                pooled.authenticated = False
+
+    def get(self, key: Hashable) -> PlatformClient:
+        """
+        Return an authenticated client for the user, logging in if necessary.
+
+        :param key: Key the user's credentials were added with.
+        :raises KeyError: if no credentials were added for the key.
+        :raises Exception: if logging in failed.
+        """
+        with self._lock:
+            if key not in self._credentials:
+                raise KeyError(key)
+            now = time.monotonic()
+            self._evict_idle(now)
+            pooled = self._clients.get(key)
+            if pooled is None:
+                client = self.client_class(session=self._new_session())
+                pooled = _PooledClient(client=client, last_used=now)
+                self._clients[key] = pooled
+                self._evict_overflow()
+            self._clients.move_to_end(key)
+            pooled.last_used = now
+            username, password = self._credentials[key]
+        # Log in outside the pool lock so that one slow login doesn't block other users.
+        with pooled.lock:
+            if not pooled.authenticated:
+                pooled.client.login(username=username, password=password)
+                pooled.authenticated = True
+        return pooled.client
+
+    def _evict_idle(self, now: float) -> None:
+        if self.idle_timeout is None:
+            return
+        while self._clients:
+            key, pooled = next(iter(self._clients.items()))
+            if now - pooled.last_used < self.idle_timeout:
+                break
+            del self._clients[key]
+
+    def _evict_overflow(self) -> None:
+        while len(self._clients) > self.max_clients:
+            self._clients.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._credentials
+
+    def __len__(self) -> int:
+        return len(self._credentials)
+
+    @property
+    def active(self) -> int:
+        """
+        Number of clients currently held in the pool.
+        """
+        return len(self._clients)
+
+    def close(self) -> None:
+        """
+        Drop all clients and close the shared connection pool.
+        """
+        with self._lock:
+            self._clients.clear()
+            self.adapter.close()
@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from easy_equities_client.clients import PlatformClient
+from easy_equities_client.instruments.types import Period
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    The latest value fetched for a scheduled job.
+
+    ``stale`` is True when the value is older than the scheduler's ``max_age`` or the
+    most recent refresh failed, in which case ``error`` describes the failure and
+    ``value`` is the last value that was fetched successfully.
+    """
+
+    value: Any
+    updated_at: float
+    stale: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class _Job:
+    fetch: Callable[[], Any]
+    interval: float
+    next_run: float = 0.0
+
+
+Listener = Callable[[Hashable, Snapshot], None]
+
+
+class PollingLoop:
+    """
+    Call ``poll()``, which returns the number of seconds until it's due again, in a
+    daemon thread or an asyncio task until stopped. `wake` makes it poll right away,
+    e.g. when new work is added.
+    """
+
+    def __init__(self, poll: Callable[[], float], name: str):
+        self.poll = poll
+        self.name = name
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Set while running as an asyncio task
+        self._async_wakeup: Optional[asyncio.Event] = None
+        self._event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def wake(self) -> None:
+        self._wakeup.set()
+        event_loop, async_wakeup = self._event_loop, self._async_wakeup
+        if event_loop is not None and async_wakeup is not None:
+            try:
+                event_loop.call_soon_threadsafe(async_wakeup.set)
+            except RuntimeError:
+                # The event loop has closed.
+                pass
+
+    def start(self) -> None:
+        """
+        Start polling in a daemon thread.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopped.set()
+        self.wake()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            delay = self.poll()
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+
+    async def run(self) -> None:
+        """
+        Poll in an asyncio task instead of a thread. Polls run in the default executor
+        so that they don't block the event loop. Cancel the task or call `stop` to stop.
+        """
+        self._stopped.clear()
+        self._async_wakeup = asyncio.Event()
+        self._event_loop = asyncio.get_running_loop()
+        try:
+            while not self._stopped.is_set():
+                delay = await asyncio.to_thread(self.poll)
+                if self._stopped.is_set():
+                    break
+                if not self._wakeup.is_set():
+                    try:
+                        await asyncio.wait_for(self._async_wakeup.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                self._async_wakeup.clear()
+                self._wakeup.clear()
+        finally:
+            self._event_loop = None
+            self._async_wakeup = None
+
+
+class RefreshScheduler:
+    """
+    Refresh account valuations, holdings and instrument prices in the background
+    so that reads never wait for a fetch.
+
+    Example::
+
+        scheduler = RefreshScheduler(client, interval=60)
+        scheduler.watch_holdings(account.id)
+        scheduler.start()
+        ...
+        snapshot = scheduler.holdings(account.id)  # returns immediately
+        if snapshot and not snapshot.stale:
+            ...
+    """
+
+    def __init__(
+        self,
+        client: PlatformClient,
+        interval: float = 60.0,
+        max_age: Optional[float] = None,
+    ):
+        """
+        :param client: Logged in platform client.
+        :param interval: Default number of seconds between refreshes of a job.
+        :param max_age: Seconds after which a snapshot is reported as stale.
+        Defaults to twice the interval.
+        """
+        self.client = client
+        self.interval = interval
+        self.max_age = max_age if max_age is not None else 2 * interval
+        self._jobs: Dict[Hashable, _Job] = {}
+        self._snapshots: Dict[Hashable, Snapshot] = {}
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+        self._poller = PollingLoop(self.refresh_due, "easy-equities-refresh")
+
+    def watch(
+        self, key: Hashable, fetch: Callable[[], Any], interval: Optional[float] = None
+    ) -> Hashable:
+        """
+        Schedule ``fetch`` to be called every ``interval`` seconds, storing its result
+        under ``key``. The first refresh happens on the scheduler's next cycle.
+        """
+        if interval is None:
+            interval = self.interval
+        with self._lock:
+            self._jobs[key] = _Job(fetch=fetch, interval=interval)
+        self._poller.wake()
+        return key
+
+    def watch_valuations(
+        self, account_id: str, interval: Optional[float] = None
+    ) -> Hashable:
+        return self.watch(
+            ("valuations", account_id),
+            lambda: self.client.accounts.valuations(account_id),
+            interval,
+        )
+
+    def watch_holdings(
+        self,
+        account_id: str,
+        include_shares: bool = False,
+        interval: Optional[float] = None,
+    ) -> Hashable:
+        return self.watch(
+            ("holdings", account_id),
+            lambda: self.client.accounts.holdings(account_id, include_shares),
+            interval,
+        )
+
+    def watch_prices(
+        self,
+        contract_code: str,
+        period: Period = Period.ONE_MONTH,
+        interval: Optional[float] = None,
+    ) -> Hashable:
+        return self.watch(
+            ("prices", contract_code, period.value),
+            lambda: self.client.instruments.historical_prices(contract_code, period),
+            interval,
+        )
+
+    def unwatch(self, key: Hashable) -> None:
+        with self._lock:
+            self._jobs.pop(key, None)
+            self._snapshots.pop(key, None)
+
+    def add_listener(self, listener: Listener) -> None:
+        """
+        Call ``listener(key, snapshot)`` from the refresh thread after every refresh.
+        """
+        self._listeners.append(listener)
+
+    def get(self, key: Hashable) -> Optional[Snapshot]:
+        """
+        Return the latest snapshot for a job without blocking, or None if the job
+        hasn't completed a refresh yet.
+        """
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            return None
+        if not snapshot.stale and time.time() - snapshot.updated_at > self.max_age:
+            return replace(snapshot, stale=True)
+        return snapshot
+
+    def valuations(self, account_id: str) -> Optional[Snapshot]:
+        return self.get(("valuations", account_id))
+
+    def holdings(self, account_id: str) -> Optional[Snapshot]:
+        return self.get(("holdings", account_id))
+
+    def prices(
+        self, contract_code: str, period: Period = Period.ONE_MONTH
+    ) -> Optional[Snapshot]:
+        return self.get(("prices", contract_code, period.value))
+
+    def refresh(self, key: Hashable) -> Snapshot:
+        """
+        Refresh a job immediately, in the calling thread.
+
+        :raises KeyError: if the key isn't watched.
+        """
+        with self._lock:
+            job = self._jobs[key]
+        return self._refresh(key, job)
+
+    def _refresh(self, key: Hashable, job: _Job) -> Snapshot:
+        job.next_run = time.monotonic() + job.interval
+        try:
+            snapshot = Snapshot(value=job.fetch(), updated_at=time.time())
+        except Exception as e:
+            logger.warning("Refreshing %s failed: %s", key, e)
+            previous = self._snapshots.get(key)
+            snapshot = Snapshot(
+                value=previous.value if previous else None,
+                updated_at=previous.updated_at if previous else 0.0,
+                stale=True,
+                error=str(e),
+            )
+        with self._lock:
+            if self._jobs.get(key) is job:
+                self._snapshots[key] = snapshot
+        for listener in self._listeners:
+            try:
+                listener(key, snapshot)
+            except Exception:
+                logger.exception("Snapshot listener failed for %s", key)
+        return snapshot
+
+    def refresh_due(self) -> float:
+        """
+        Refresh every job that is due and return the number of seconds until the
+        next job is due.
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = [(key, job) for key, job in self._jobs.items() if job.next_run <= now]
+        for key, job in due:
+            with self._lock:
+                if self._jobs.get(key) is not job:
+                    # Unwatched or replaced since
+                    continue
+            self._refresh(key, job)
+        with self._lock:
+            next_runs = [job.next_run for job in self._jobs.values()]
+        if not next_runs:
+            return self.interval
+        return max(0.0, min(next_runs) - time.monotonic())
+
+    def start(self) -> None:
+        """
+        Start refreshing in a daemon thread.
+        """
+        self._poller.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._poller.stop(timeout)
+
+    async def run(self) -> None:
+        """
+        Refresh in an asyncio task instead of a thread, e.g.
+        ``asyncio.create_task(scheduler.run())``. Fetches run in the default executor
+        so that they don't block the event loop. Cancel the task or call `stop` to stop.
+        """
+        await self._poller.run()
@@ -0,0 +1,470 @@
+import copy
+import json
+import logging
+import queue
+import threading
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
+from urllib.parse import parse_qs, urlsplit
+
+from easy_equities_client.accounts.diff import HoldingsDiffer
+from easy_equities_client.clients import PlatformClient
+from easy_equities_client.instruments.watcher import PriceUpdate, PriceWatcher
+from easy_equities_client.scheduler import RefreshScheduler, Snapshot
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[str, Any]
+
+EVENT_TYPES = ("holdings", "valuations", "price", "error")
+
+
+def _to_json(value: Union[Event, List[Event]]) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+class _Subscription:
+    def __init__(self, types: Optional[Set[str]], max_queue: int):
+        self.types = types
+        self.events: "queue.Queue[Optional[Event]]" = queue.Queue(max_queue)
+        self.closed = False
+
+    def wants(self, event: Event) -> bool:
+        return self.types is None or event['type'] in self.types
+
+
+class StreamHub:
+    """
+    Fan events out to subscribers, each with its own bounded queue.
+
+    A subscriber that falls `max_queue` events behind is disconnected instead of
+    slowing down the others. It can reconnect to get a fresh snapshot.
+    """
+
+    def __init__(self, max_queue: int = 1000):
+        self.max_queue = max_queue
+        self._subscriptions: List[_Subscription] = []
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscriptions)
+
+    def _put(self, subscription: _Subscription, event: Event) -> None:
+        if subscription.closed or not subscription.wants(event):
+            return
+        try:
+            subscription.events.put_nowait(event)
+        except queue.Full:
+            logger.warning("Disconnecting a subscriber that fell behind")
+            self._close(subscription)
+
+    def _close(self, subscription: _Subscription) -> None:
+        subscription.closed = True
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+        # Wake up the subscriber's reader even if its queue is full.
+        while True:
+            try:
+                subscription.events.put_nowait(None)
+                return
+            except queue.Full:
+                try:
+                    subscription.events.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def subscribe(
+        self,
+        types: Optional[Iterable[str]] = None,
+        initial: Callable[[], Iterable[Event]] = lambda: (),
+    ) -> _Subscription:
+        """
+        Add a subscriber to the events of the given types (default: all), starting
+        with the events returned by ``initial()``.
+        """
+        subscription = _Subscription(
+            None if types is None else set(types), self.max_queue
+        )
+        with self._lock:
+            for event in initial():
+                self._put(subscription, self._numbered(event))
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: _Subscription) -> None:
+        with self._lock:
+            self._close(subscription)
+
+    def _numbered(self, event: Event) -> Event:
+        self._next_id += 1
+        return {'id': self._next_id, **event}
+
+    def publish(self, event: Event) -> None:
+        with self._lock:
+            event = self._numbered(event)
+            for subscription in list(self._subscriptions):
+                self._put(subscription, event)
+
+    def close(self) -> None:
+        with self._lock:
+            for subscription in list(self._subscriptions):
+                self._close(subscription)
+
+
+class StreamServer:
+    """
+    Serve the holdings, valuations and prices of a client's accounts to many local
+    subscribers, from one logged in session.
+
+    Holdings and valuations are refreshed by a `RefreshScheduler` and prices by a
+    `PriceWatcher`, so the platform is polled once per refresh however many
+    subscribers there are. Only changes are pushed: the holdings added, removed and
+    changed since the previous refresh (see `HoldingsDiffer`), valuations that
+    differ from the previous ones, and changed prices. New subscribers first get the
+    current state in the same form, e.g. every holding as added.
+
+    Endpoints:
+
+    - ``GET /events``: Server-Sent Events, one event per change.
+    - ``GET /stream``: NDJSON, one change per line.
+    - ``GET /snapshot``: the current state as a JSON list of events.
+
+    Pass ``?types=holdings,price`` to only get some event types (``holdings``,
+    ``valuations``, ``price`` or ``error``). Every event has an increasing ``id``.
+    Events replace the subscriber's state rather than increment it, so applying one
+    twice is harmless.
+
+    Example::
+
+        server = StreamServer(client, port=8765)
+        server.serve_forever()
+
+        $ curl -N http://127.0.0.1:8765/stream?types=price
+    """
+
+    def __init__(
+        self,
+        client: PlatformClient,
+        account_ids: Optional[Iterable[str]] = None,
+        contract_codes: Iterable[str] = (),
+        watch_held_prices: bool = True,
+        include_shares: bool = False,
+        interval: float = 60.0,
+        price_freshness: float = 60.0,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        heartbeat: float = 15.0,
+        max_queue: int = 1000,
+        allowed_origins: Iterable[str] = (),
+        allowed_hosts: Optional[Iterable[str]] = None,
+    ):
+        """
+        :param client: Platform client, logged in or logging in lazily.
+        :param account_ids: Accounts to serve, defaults to all of the user's accounts.
+        :param contract_codes: Instruments whose prices to serve.
+        :param watch_held_prices: Also serve the prices of every held instrument.
+        :param include_shares: Include share counts in holdings (see
+        `AccountsClient.holdings`).
+        :param interval: Seconds between refreshes of holdings and valuations.
+        :param price_freshness: Target freshness of prices (see `PriceWatcher`).
+        :param port: Port to listen on, 0 for any free port.
+        :param heartbeat: Seconds between keepalives sent to idle subscribers.
+        :param max_queue: Events a subscriber may fall behind before it's
+        disconnected.
+        :param allowed_origins: Web origins (e.g. "http://localhost:3000") whose pages
+        may read the streams from a browser. None by default, since the streams hold
+        the user's portfolio.
+        :param allowed_hosts: Host names the server may be reached by, to block DNS
+        rebinding. Defaults to localhost, 127.0.0.1, ::1 and `host`.
+        """
+        self.client = client
+        self.account_ids = None if account_ids is None else list(account_ids)
+        self.contract_codes = set(contract_codes)
+        self.watch_held_prices = watch_held_prices
+        self.include_shares = include_shares
+        self.heartbeat = heartbeat
+        self.scheduler = RefreshScheduler(client, interval)
+        self.watcher = PriceWatcher(client, freshness=price_freshness)
+        self.differ = HoldingsDiffer()
+        self.hub = StreamHub(max_queue)
+        self.allowed_origins = set(allowed_origins)
+        if allowed_hosts is None:
+            allowed_hosts = {"localhost", "127.0.0.1", "[::1]", host}
+        self.allowed_hosts = set(allowed_hosts)
+        self._valuations: Dict[str, Any] = {}
+        self._watched_codes: Set[str] = set()
+        # Guards the differ, valuations and watched codes, which are updated by the
+        # refresh threads and read by request handlers.
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        """
+        Start refreshing and serving in daemon threads.
+        """
+        if self.account_ids is None:
+            self.account_ids = [account.id for account in self.client.accounts.list()]
+        self.scheduler.add_listener(self._on_snapshot)
+        self.watcher.add_listener(self._on_price)
+        for account_id in self.account_ids:
+            self.scheduler.watch_holdings(account_id, self.include_shares)
+            self.scheduler.watch_valuations(account_id)
+        self._update_watched_codes()
+        self.scheduler.start()
+        self.watcher.start()
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="easy-equities-stream", daemon=True
+        )
+        self._thread.start()
+        logger.info("Streaming portfolio updates on %s", self.url)
+
+    def serve_forever(self) -> None:
+        """
+        Start and block until interrupted.
+        """
+        self.start()
+        try:
+            if self._thread is not None:
+                self._thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self.scheduler.stop()
+        self.watcher.close()
+        self.hub.close()
+        if self._thread:
+            self.httpd.shutdown()
+            self._thread = None
+        self.httpd.server_close()
+
+    def _held_codes(self) -> Set[str]:
+        codes: Set[str] = set()
+        for account_id in self.account_ids or ():
+            snapshot = self.differ.snapshot(account_id)
+            if snapshot is not None:
+                codes.update(
+                    holding['contract_code']
+                    for holding in snapshot.holdings.values()
+                    if holding.get('contract_code')
+                )
+        return codes
+
+    def _update_watched_codes(self) -> None:
+        with self._lock:
+            codes = set(self.contract_codes)
+            if self.watch_held_prices:
+                codes |= self._held_codes()
+            added = codes - self._watched_codes
+            removed = self._watched_codes - codes
+            self._watched_codes = codes
+        for code in added:
+            self.watcher.watch(code)
+        for code in removed:
+            self.watcher.unwatch(code)
+
+    def _on_snapshot(self, key: Hashable, snapshot: Snapshot) -> None:
+        # Keys of the jobs watched in `start`
+        kind, account_id = cast(Tuple[str, str], key)
+        if snapshot.error is not None:
+            self.hub.publish(
+                {
+                    'type': 'error',
+                    'source': kind,
+                    'account_id': account_id,
+                    'error': snapshot.error,
+                }
+            )
+            return
+        # Events are published outside the lock: `snapshot` is called under the hub's
+        # lock when a subscriber joins.
+        if kind == "holdings":
+            with self._lock:
+                diff = self.differ.update(account_id, snapshot.value)
+            if diff:
+                self.hub.publish(
+                    {'type': 'holdings', 'account_id': account_id, **diff.to_dict()}
+                )
+                self._update_watched_codes()
+        elif kind == "valuations":
+            with self._lock:
+                changed = self._valuations.get(account_id) != snapshot.value
+                if changed:
+                    self._valuations[account_id] = snapshot.value
+            if changed:
+                self.hub.publish(
+                    {
+                        'type': 'valuations',
+                        'account_id': account_id,
+                        'valuations': snapshot.value,
+                    }
+                )
+
+    def _on_price(self, update: PriceUpdate) -> None:
+        self.hub.publish({'type': 'price', **asdict(update)})
+
+    def snapshot(self) -> List[Event]:
+        """
+        Return the current state as events, as sent to new subscribers.
+        """
+        events: List[Event] = []
+        with self._lock:
+            for account_id in self.account_ids or ():
+                holdings = self.differ.snapshot(account_id)
+                if holdings is not None:
+                    events.append(
+                        {
+                            'type': 'holdings',
+                            'account_id': account_id,
+                            'added': list(holdings.holdings.values()),
+                            'removed': [],
+                            'changed': [],
+                        }
+                    )
+                if account_id in self._valuations:
+                    events.append(
+                        {
+                            'type': 'valuations',
+                            'account_id': account_id,
+                            'valuations': copy.deepcopy(self._valuations[account_id]),
+                        }
+                    )
+            codes = sorted(self._watched_codes)
+        for code in codes:
+            price = self.watcher.price(code)
+            if price is not None:
+                events.append({'type': 'price', **asdict(price)})
+        return events
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(_StreamHandler):
+            stream_server = server
+
+        return Handler
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    stream_server: StreamServer
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_headers(self, content_type: str, length: Optional[int] = None) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        origin = self.headers.get("Origin")
+        if origin and origin in self.stream_server.allowed_origins:
+            self.send_header("Access-Control-Allow-Origin", origin)
+            self.send_header("Vary", "Origin")
+        if length is not None:
+            self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+    def _host_allowed(self) -> bool:
+        host = self.headers.get("Host", "")
+        # Strip the port, keeping IPv6 addresses in brackets.
+        if host.startswith("["):
+            host = host[: host.find("]") + 1]
+        else:
+            host = host.partition(":")[0]
+        return host in self.stream_server.allowed_hosts
+
+    def do_GET(self) -> None:
+        if not self._host_allowed():
+            self.send_error(403, "Host not allowed")
+            return
+        url = urlsplit(self.path)
+        types_query = parse_qs(url.query).get('types')
+        types = None
+        if types_query:
+            types = {t for value in types_query for t in value.split(',') if t}
+            unknown = types - set(EVENT_TYPES)
+            if unknown:
+                self.send_error(400, f"Unknown event types: {', '.join(unknown)}")
+                return
+        if url.path == "/snapshot":
+            events = [
+                event
+                for event in self.stream_server.snapshot()
+                if types is None or event['type'] in types
+            ]
+            body = _to_json(events).encode()
+            self._send_headers("application/json", len(body))
+            self.wfile.write(body)
+        elif url.path == "/events":
+            self._stream(types, "text/event-stream", self._sse)
+        elif url.path == "/stream":
+            self._stream(types, "application/x-ndjson", self._ndjson)
+        else:
+            self.send_error(404)
+
+    @staticmethod
+    def _sse(event: Optional[Event]) -> bytes:
+        if event is None:
+            return b": keepalive\n\n"
+        return (
+            f"id: {event['id']}\nevent: {event['type']}\ndata: {_to_json(event)}\n\n"
+        ).encode()
+
+    @staticmethod
+    def _ndjson(event: Optional[Event]) -> bytes:
+        if event is None:
+            event = {'type': 'heartbeat'}
+        return (_to_json(event) + "\n").encode()
+
+    def _stream(
+        self,
+        types: Optional[Set[str]],
+        content_type: str,
+        encode: Callable[[Optional[Event]], bytes],
+    ) -> None:
+        hub = self.stream_server.hub
+        subscription = hub.subscribe(types, self.stream_server.snapshot)
+        self._send_headers(content_type)
+        try:
+            while True:
+                try:
+                    event = subscription.events.get(
+                        timeout=self.stream_server.heartbeat
+                    )
+                except queue.Empty:
+                    event = None
+                else:
+                    if event is None:
+                        # Disconnected by the hub
+                        return
+                self.wfile.write(encode(event))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            hub.unsubscribe(subscription)
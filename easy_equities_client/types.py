@@ -1,18 +1,86 @@
 from typing import Optional
 
-from requests import Session
+from requests import RequestException, Response, Session, Timeout
+
+from easy_equities_client.utils.bandwidth import BandwidthMeter
+from easy_equities_client.utils.resilience import (
+    CircuitBreakers,
+    Deadline,
+    DeadlineExceeded,
+)
 
 
 class Client:
-    def __init__(self, base_url: str = "", session: Session = None):
+    def __init__(
+        self,
+        base_url: str = "",
+        session: Session = None,
+        circuit_breakers: CircuitBreakers = None,
+        bandwidth: BandwidthMeter = None,
+    ):
         self.base_url = base_url
         if session is None:
             self.session = Session()
         else:
             self.session = session
+        # Fail fast on endpoints that keep failing, per path.
+        self.circuit_breakers = (
+            CircuitBreakers() if circuit_breakers is None else circuit_breakers
+        )
+        # Bytes received per path, on the wire and decompressed.
+        self.bandwidth = BandwidthMeter() if bandwidth is None else bandwidth
 
     def _url(self, path: str, query: Optional[str] = None) -> str:
         url = f"{self.base_url}{path}"
         if query:
             return f"{url}?{query}"
         return url
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        query: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        **kwargs,
+    ) -> Response:
+        """
+        Make a request through the circuit breaker of its path, with a timeout of at
+        most the time left before the deadline, and count the bytes it received.
+
+        :raises CircuitOpenError: if the path keeps failing.
+        :raises DeadlineExceeded: if the deadline passed before or during the request.
+        Timeouts caused by the deadline don't count as failures of the endpoint.
+        """
+        endpoint = path.partition('?')[0]
+        breaker = self.circuit_breakers.get(endpoint)
+        default_timeout = kwargs.get('timeout')
+        if deadline is not None:
+            kwargs['timeout'] = deadline.timeout(default_timeout)
+        # A timeout shortened by the caller's deadline isn't the endpoint's fault.
+        deadline_timeout = kwargs.get('timeout') != default_timeout
+        trial = breaker.before_call()
+        try:
+            try:
+                response = self.session.request(
+                    method, self._url(path, query), **kwargs
+                )
+            except RequestException as e:
+                if deadline is not None and (
+                    deadline.expired or (deadline_timeout and isinstance(e, Timeout))
+                ):
+                    raise DeadlineExceeded(
+                        f"Deadline exceeded requesting {path}"
+                    ) from e
+                breaker.record_failure()
+                raise
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        finally:
+            if trial:
+                # In case the call wasn't counted, e.g. on a deadline.
+                breaker.end_trial()
+        self.bandwidth.record(endpoint, response)
+        return response
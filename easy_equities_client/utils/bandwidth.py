@@ -0,0 +1,99 @@
+import threading
+from dataclasses import dataclass, replace
+from typing import Dict
+
+from requests import Response
+from urllib3.util import make_headers
+
+# The encodings urllib3 can decode while reading a response: gzip and deflate, plus
+# br and zstd if brotli or zstandard are installed.
+ACCEPT_ENCODING = make_headers(accept_encoding=True)['accept-encoding']
+
+
+def wire_bytes(response: Response) -> int:
+    """
+    Return the number of body bytes of a read response as sent over the wire, i.e.
+    before decompression.
+    """
+    tell = getattr(response.raw, 'tell', None)
+    if tell is not None:
+        try:
+            read = tell()
+        except (OSError, ValueError):
+            read = 0
+        if read:
+            return read
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit():
+        return int(content_length)
+    return len(response.content or b'')
+
+
+@dataclass
+class EndpointBandwidth:
+    requests: int = 0
+    # Body bytes received, compressed as sent by the server
+    wire_bytes: int = 0
+    # Body bytes after decompression
+    decoded_bytes: int = 0
+
+    @property
+    def compression_ratio(self) -> float:
+        """
+        Decoded bytes per byte on the wire, 1.0 for uncompressed responses.
+        """
+        return self.decoded_bytes / self.wire_bytes if self.wire_bytes else 1.0
+
+
+class BandwidthMeter:
+    """
+    Count the bytes received per endpoint, on the wire and after decompression.
+
+    Example::
+
+        client.accounts.holdings(account.id)
+        for endpoint, usage in client.bandwidth.reset().items():
+            print(endpoint, usage.wire_bytes, usage.decoded_bytes)
+    """
+
+    def __init__(self):
+        self._endpoints: Dict[str, EndpointBandwidth] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, response: Response) -> None:
+        """
+        Count a response whose body has been read.
+        """
+        wire = wire_bytes(response)
+        decoded = len(response.content or b'')
+        with self._lock:
+            usage = self._endpoints.setdefault(endpoint, EndpointBandwidth())
+            usage.requests += 1
+            usage.wire_bytes += wire
+            usage.decoded_bytes += decoded
+
+    def usage(self) -> Dict[str, EndpointBandwidth]:
+        """
+        Return the bytes received per endpoint since the last reset.
+        """
+        with self._lock:
+            return {
+                endpoint: replace(usage) for endpoint, usage in self._endpoints.items()
+            }
+
+    def total(self) -> EndpointBandwidth:
+        total = EndpointBandwidth()
+        for usage in self.usage().values():
+            total.requests += usage.requests
+            total.wire_bytes += usage.wire_bytes
+            total.decoded_bytes += usage.decoded_bytes
+        return total
+
+    def reset(self) -> Dict[str, EndpointBandwidth]:
+        """
+        Start counting again, e.g. at the start of a refresh cycle, and return the
+        bytes received per endpoint until now.
+        """
+        with self._lock:
+            endpoints, self._endpoints = self._endpoints, {}
+        return endpoints
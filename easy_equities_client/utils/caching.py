@@ -0,0 +1,162 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from requests import Response
+
+_MISSING = object()
+
+
+@dataclass
+class _CachedResponse:
+    digest: bytes
+    result: Any
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class ResponseCache:
+    """
+    Remember the parsed result of a response per key (e.g. endpoint and account) so
+    that an unchanged response isn't parsed again.
+
+    A response is unchanged if the server answers a conditional request with
+    304 Not Modified, or if its body hashes to the same digest as last time.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def headers(self, key: Hashable) -> Dict[str, str]:
+        """
+        Return the conditional request headers to send for a key.
+        """
+        entry = self._entries.get(key)
+        headers = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def parse(
+        self, key: Hashable, response: Response, parse: Callable[[bytes], Any]
+    ) -> Any:
+        """
+        Return ``parse(response.content)``, or a copy of the previous result if the
+        response for this key hasn't changed.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and response.status_code == 304:
+            return copy.deepcopy(entry.result)
+        digest = hashlib.blake2b(response.content, digest_size=16).digest()
+        if entry is None or entry.digest != digest:
+            entry = _CachedResponse(digest=digest, result=parse(response.content))
+        entry.etag = response.headers.get("ETag")
+        entry.last_modified = response.headers.get("Last-Modified")
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return copy.deepcopy(entry.result)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@dataclass
+class _KeyLock:
+    lock: threading.Lock
+    # Callers loading or waiting for the key
+    users: int = 0
+
+
+class TTLCache:
+    """
+    Thread-safe cache whose entries expire after ``ttl`` seconds.
+
+    `get_or_load` calls the loader at most once per key at a time; concurrent callers
+    for the same key wait for that call instead of loading the value again. Expired
+    entries are dropped when they're read or the cache is full, and the least
+    recently stored entries are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, _KeyLock] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] < time.monotonic():
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return default
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                now = time.monotonic()
+                for expired in [k for k, e in self._entries.items() if e[0] < now]:
+                    del self._entries[expired]
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def get_or_load(
+        self, key: Hashable, load: Callable[[], Any], ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Return the cached value for a key, calling ``load()`` to fill it if it's
+        missing or expired.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.get(key)
+            if key_lock is None:
+                key_lock = self._key_locks[key] = _KeyLock(threading.Lock())
+            key_lock.users += 1
+        try:
+            with key_lock.lock:
+                value = self.get(key, _MISSING)
+                if value is _MISSING:
+                    value = load()
+                    self.set(key, value, ttl)
+        finally:
+            with self._lock:
+                key_lock.users -= 1
+                if not key_lock.users:
+                    del self._key_locks[key]
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Remove one key, or every key if no key is given.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,505 @@
+"""
+Compact binary encoding of the client's record lists (accounts, holdings, holding
+details, transactions) for passing between processes and storing in caches.
+
+Lists of records are stored column by column against the record type's field
+table, which is stored with them so that data outlives changes to the record
+types: string fields as one NUL separated UTF-8 block, numeric fields as packed
+64-bit arrays, and a bitmask per record only when records don't all have the same
+fields. Any other value is stored as a flat stream of 32-bit tokens with every
+string, including dict keys, kept once in a string table. That is smaller than json
+but slower to decode, so nested values such as a `Valuation` are better sent as
+json.
+
+``loads(dumps(value)) == value`` for every supported value, with the same types:
+records that don't fit their field table exactly fall back to the generic
+encoding instead of being coerced.
+"""
+import struct
+import sys
+from array import array
+from dataclasses import fields
+from itertools import chain, islice
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from easy_equities_client.accounts.types import Account, Holding, HoldingDetail
+
+MAGIC = b"EEC"
+# Version 1 had no field tables in the data.
+VERSION = 2
+
+_HEADER = struct.Struct("<3sBBI")
+_U32 = struct.Struct("<I")
+
+# Kinds of record fields
+_STR, _INT, _FLOAT = "s", "q", "d"
+
+_INT64_MIN, _INT64_MAX = -(2**63), 2**63 - 1
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+# String blocks are NUL separated, or length prefixed if a string contains NUL.
+_JOINED, _LENGTH_PREFIXED = 0, 1
+
+
+class CodecError(ValueError):
+    pass
+
+
+class _DoesNotFit(Exception):
+    pass
+
+
+def _array_bytes(values: array) -> bytes:
+    if not _LITTLE_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _array_from(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if not _LITTLE_ENDIAN:
+        values.byteswap()
+    return values
+
+
+class _Writer:
+    def __init__(self):
+        self.parts: List[bytes] = []
+
+    def u32(self, value: int) -> None:
+        self.parts.append(_U32.pack(value))
+
+    def block(self, data: bytes) -> None:
+        self.u32(len(data))
+        self.parts.append(data)
+
+    def strings(self, values: Sequence[str]) -> None:
+        joined = "\0".join(values)
+        # The count tells an empty column apart from a column of one empty string.
+        self.u32(len(values))
+        if joined.count("\0") == max(len(values) - 1, 0):
+            self.parts.append(bytes([_JOINED]))
+            self.block(joined.encode("utf-8"))
+        else:
+            encoded = [value.encode("utf-8") for value in values]
+            self.parts.append(bytes([_LENGTH_PREFIXED]))
+            self.numbers("I", [len(value) for value in encoded])
+            self.block(b"".join(encoded))
+
+    def numbers(self, typecode: str, values: Sequence) -> None:
+        self.block(_array_bytes(array(typecode, values)))
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.parts)
+
+
+class _Reader:
+    def __init__(self, data: bytes, position: int):
+        self.data = data
+        self.position = position
+
+    def u32(self) -> int:
+        (value,) = _U32.unpack_from(self.data, self.position)
+        self.position += _U32.size
+        return value
+
+    def byte(self) -> int:
+        if self.position >= len(self.data):
+            raise CodecError("Truncated data")
+        self.position += 1
+        return self.data[self.position - 1]
+
+    def block(self) -> bytes:
+        length = self.u32()
+        start = self.position
+        self.position = start + length
+        if self.position > len(self.data):
+            raise CodecError("Truncated data")
+        return self.data[start : self.position]
+
+    def strings(self) -> List[str]:
+        count = self.u32()
+        mode = self.byte()
+        if mode == _JOINED:
+            block = self.block()
+            return block.decode("utf-8").split("\0") if count else []
+        lengths = self.numbers("I")
+        block = self.block()
+        strings, position = [], 0
+        for length in lengths:
+            strings.append(block[position : position + length].decode("utf-8"))
+            position += length
+        return strings
+
+    def numbers(self, typecode: str) -> List:
+        return _array_from(typecode, self.block()).tolist()
+
+
+class _RecordSchema:
+    """
+    Field table of a record type: each field's name and kind.
+    """
+
+    def __init__(
+        self,
+        schema: Sequence[Tuple[str, str]],
+        record_type: type = dict,
+        from_values: Callable[..., Any] = None,
+    ):
+        self.names = [name for name, _ in schema]
+        self.kinds = dict(schema)
+        self.record_type = record_type
+        self.from_values = from_values
+        if record_type is dict:
+            self._getter: Callable[[str], Callable] = itemgetter
+            self._keys: Callable[[Any], Any] = dict.keys
+        else:
+            self._getter = attrgetter
+            self._keys = lambda record: record.__dict__.keys()
+
+    def _column(self, name: str, values: List[Any]) -> List[Any]:
+        types = set(map(type, values))
+        kind = self.kinds[name]
+        expected = {_STR: str, _INT: int, _FLOAT: float}[kind]
+        if types and types != {expected}:
+            raise _DoesNotFit()
+        if kind == _INT and values and not (
+            _INT64_MIN <= min(values) and max(values) <= _INT64_MAX
+        ):
+            raise _DoesNotFit()
+        return values
+
+    def encode(self, records: List[Any], writer: _Writer) -> None:
+        """
+        :raises _DoesNotFit: if the records don't fit the field table.
+        """
+        if set(map(type, records)) != {self.record_type}:
+            raise _DoesNotFit()
+        first = self._keys(records[0])
+        if not first <= self.kinds.keys():
+            raise _DoesNotFit()
+        uniform = all(self._keys(record) == first for record in records)
+        if uniform:
+            present = [name for name in self.names if name in first]
+            mask = sum(1 << i for i, name in enumerate(self.names) if name in first)
+            columns = {
+                name: self._column(name, list(map(self._getter(name), records)))
+                for name in present
+            }
+        else:
+            values = [self._values(record) for record in records]
+            columns = {
+                name: self._column(name, [v[name] for v in values if name in v])
+                for name in self.names
+            }
+        # The field table travels with the records, so that they still decode by
+        # name after fields are added to or removed from the record types.
+        writer.strings(self.names)
+        writer.strings([self.kinds[name] for name in self.names])
+        writer.parts.append(bytes([uniform]))
+        if uniform:
+            writer.u32(mask)
+        else:
+            writer.numbers(
+                "I",
+                [
+                    sum(1 << i for i, name in enumerate(self.names) if name in v)
+                    for v in values
+                ],
+            )
+        for name in self.names:
+            column = columns.get(name, [])
+            if self.kinds[name] == _STR:
+                writer.strings(column)
+            else:
+                writer.numbers(self.kinds[name], column)
+
+    def _values(self, record: Any) -> dict:
+        values = record if self.record_type is dict else record.__dict__
+        if not values.keys() <= self.kinds.keys():
+            raise _DoesNotFit()
+        return values
+
+    def decode(self, count: int, reader: _Reader) -> List[Any]:
+        names = reader.strings()
+        kinds = reader.strings()
+        if (
+            len(kinds) != len(names)
+            or len(names) > 32
+            or not set(kinds) <= {_STR, _INT, _FLOAT}
+        ):
+            raise CodecError("Corrupt field table")
+        uniform = reader.byte()
+        if uniform:
+            mask = reader.u32()
+            masks = None
+        else:
+            masks = reader.numbers("I")
+            if len(masks) != count:
+                raise CodecError("Record count doesn't match the field masks")
+        columns = [
+            reader.strings() if kind == _STR else reader.numbers(kind) for kind in kinds
+        ]
+        if masks is None:
+            present = [i for i in range(len(names)) if mask & (1 << i)]
+            if any(len(columns[i]) != count for i in present):
+                raise CodecError("Record count doesn't match the columns")
+            if self.from_values is not None and names == self.names:
+                return list(map(self.from_values, *(columns[i] for i in present)))
+            if not present:
+                rows: List[dict] = [{} for _ in range(count)]
+            else:
+                present_names = [names[i] for i in present]
+                rows = [
+                    dict(zip(present_names, values))
+                    for values in zip(*(columns[i] for i in present))
+                ]
+        else:
+            iterators = [iter(column) for column in columns]
+            try:
+                rows = [
+                    {
+                        name: next(iterators[i])
+                        for i, name in enumerate(names)
+                        if mask & (1 << i)
+                    }
+                    for mask in masks
+                ]
+            except StopIteration as e:
+                raise CodecError("Record count doesn't match the columns") from e
+        if self.from_values is None:
+            return rows
+        try:
+            return [self.from_values(**row) for row in rows]
+        except TypeError as e:
+            raise CodecError(
+                f"Fields don't match {self.record_type.__name__}: {e}"
+            ) from e
+
+
+_ACCOUNT = _RecordSchema(
+    [(f.name, _STR) for f in fields(Account)], record_type=Account, from_values=Account
+)
+_HOLDING = _RecordSchema([(name, _STR) for name in Holding.__annotations__])
+_HOLDING_DETAIL = _RecordSchema(
+    [(name, _STR) for name in HoldingDetail.__annotations__]
+)
+_TRANSACTION = _RecordSchema(
+    [
+        ('TransactionId', _INT),
+        ('DebitCredit', _FLOAT),
+        ('Comment', _STR),
+        ('TransactionDate', _STR),
+        ('LogId', _INT),
+        ('ActionId', _INT),
+        ('Action', _STR),
+        ('ContractCode', _STR),
+    ]
+)
+
+# Tag in the header: the record schema, or 0 for the generic encoding.
+_GENERIC = 0
+_SCHEMAS: Dict[int, _RecordSchema] = {
+    1: _ACCOUNT,
+    2: _HOLDING,
+    3: _TRANSACTION,
+    4: _HOLDING_DETAIL,
+}
+_SCHEMA_NAMES = {
+    "accounts": 1,
+    "holdings": 2,
+    "transactions": 3,
+    "holding_details": 4,
+}
+
+# Generic encoding: each token is an opcode in the low 4 bits and an operand (an
+# index into the string, int or float table, or a length) in the high 28 bits.
+# _TABLE is a list of dicts with the same keys and only str values, such as the
+# `LabelValue` lists of a `Valuation`: the keys once, then every value.
+(_NONE, _TRUE, _FALSE, _INT_OP, _FLOAT_OP, _STR_OP, _LIST, _DICT, _BIG_INT, _TABLE) = (
+    range(10)
+)
+_OPERAND_LIMIT = 1 << 28
+
+
+def _string_table(items: List[Any]) -> Optional[Tuple[List[str], List[str]]]:
+    """
+    Return the keys and all the values of a list of dicts with the same keys and
+    only str values, or None for any other list.
+    """
+    if len(items) < 2 or set(map(type, items)) != {dict}:
+        return None
+    keys = items[0].keys()
+    if not all(item.keys() == keys for item in items):
+        return None
+    if set(map(type, keys)) != {str}:
+        return None
+    values = list(chain.from_iterable(map(dict.values, items)))
+    if set(map(type, values)) != {str}:
+        return None
+    return list(keys), values
+
+
+def _encode_generic(value: Any, writer: _Writer) -> None:
+    tokens: List[int] = []
+    ints: List[int] = []
+    floats: List[float] = []
+    string_ids: Dict[str, int] = {}
+
+    def string(value: str) -> int:
+        index = string_ids.get(value)
+        if index is None:
+            index = string_ids[value] = len(string_ids)
+        return index
+
+    def encode(value: Any) -> None:
+        kind = type(value)
+        if kind is str:
+            tokens.append(_STR_OP | string(value) << 4)
+        elif kind is dict:
+            tokens.append(_DICT | len(value) << 4)
+            for key, item in value.items():
+                if type(key) is not str:
+                    raise TypeError(f"Can't encode dict key {key!r}, keys must be str")
+                tokens.append(string(key))
+                encode(item)
+        elif kind is list:
+            table = _string_table(value)
+            if table is not None:
+                keys, values = table
+                tokens.append(_TABLE | len(value) << 4)
+                tokens.append(len(keys))
+                tokens.extend(string(key) for key in keys)
+                tokens.extend(
+                    [string_ids.setdefault(item, len(string_ids)) for item in values]
+                )
+                return
+            tokens.append(_LIST | len(value) << 4)
+            for item in value:
+                encode(item)
+        elif kind is float:
+            tokens.append(_FLOAT_OP | len(floats) << 4)
+            floats.append(value)
+        elif kind is int:
+            if _INT64_MIN <= value <= _INT64_MAX:
+                tokens.append(_INT_OP | len(ints) << 4)
+                ints.append(value)
+            else:
+                tokens.append(_BIG_INT | string(str(value)) << 4)
+        elif value is None:
+            tokens.append(_NONE)
+        elif value is True:
+            tokens.append(_TRUE)
+        elif value is False:
+            tokens.append(_FALSE)
+        else:
+            raise TypeError(f"Can't encode {kind.__name__}")
+
+    encode(value)
+    if max(len(tokens), len(string_ids)) >= _OPERAND_LIMIT:
+        raise CodecError("Value too large to encode")
+    writer.strings(list(string_ids))
+    writer.numbers("q", ints)
+    writer.numbers("d", floats)
+    writer.numbers("I", tokens)
+
+
+def _decode_generic(reader: _Reader) -> Any:
+    strings = reader.strings()
+    ints = reader.numbers("q")
+    floats = reader.numbers("d")
+    tokens = iter(reader.numbers("I"))
+
+    def decode() -> Any:
+        token = next(tokens)
+        op, operand = token & 15, token >> 4
+        if op == _STR_OP:
+            return strings[operand]
+        if op == _DICT:
+            return {strings[next(tokens)]: decode() for _ in range(operand)}
+        if op == _LIST:
+            return [decode() for _ in range(operand)]
+        if op == _TABLE:
+            keys = [strings[next(tokens)] for _ in range(next(tokens))]
+            values = list(map(strings.__getitem__, islice(tokens, operand * len(keys))))
+            if len(values) != operand * len(keys):
+                raise CodecError("Corrupt data")
+            width = len(keys)
+            return [
+                dict(zip(keys, values[i : i + width]))
+                for i in range(0, len(values), width)
+            ]
+        if op == _FLOAT_OP:
+            return floats[operand]
+        if op == _INT_OP:
+            return ints[operand]
+        if op == _NONE:
+            return None
+        if op == _TRUE:
+            return True
+        if op == _FALSE:
+            return False
+        if op == _BIG_INT:
+            return int(strings[operand])
+        raise CodecError(f"Unknown opcode {op}")
+
+    try:
+        return decode()
+    except (StopIteration, IndexError) as e:
+        raise CodecError("Corrupt data") from e
+
+
+def dumps(value: Any, schema: Optional[str] = None) -> bytes:
+    """
+    Encode a client result: a list of `Account`s, `Holding`s, `HoldingDetail`s or
+    `Transaction`s, or any value made of dicts with str keys, lists, str, int,
+    float, bool and None. Use json for valuations, which decode faster from json.
+
+    :param schema: Only try this record type instead of detecting it: "accounts",
+    "holdings", "holding_details" or "transactions". Records that don't fit it are
+    still encoded generically.
+    :raises TypeError: for values of other types.
+    """
+    tags = [_SCHEMA_NAMES[schema]] if schema is not None else list(_SCHEMAS)
+    if type(value) is list and value:
+        for tag in tags:
+            writer = _Writer()
+            writer.parts.append(_HEADER.pack(MAGIC, VERSION, tag, len(value)))
+            try:
+                _SCHEMAS[tag].encode(value, writer)
+            except _DoesNotFit:
+                continue
+            return writer.getvalue()
+    writer = _Writer()
+    writer.parts.append(_HEADER.pack(MAGIC, VERSION, _GENERIC, 0))
+    _encode_generic(value, writer)
+    return writer.getvalue()
+
+
+def loads(data: bytes) -> Any:
+    """
+    Decode a value encoded with `dumps`.
+
+    :raises CodecError: if the data wasn't encoded with a compatible `dumps`.
+    """
+    try:
+        magic, version, tag, count = _HEADER.unpack_from(data)
+    except struct.error as e:
+        raise CodecError("Truncated data") from e
+    if magic != MAGIC:
+        raise CodecError("Not encoded with easy_equities_client.utils.codec")
+    if version != VERSION:
+        raise CodecError(f"Unsupported codec version {version}")
+    reader = _Reader(data, _HEADER.size)
+    try:
+        if tag == _GENERIC:
+            return _decode_generic(reader)
+        if tag not in _SCHEMAS:
+            raise CodecError(f"Unknown record type {tag}")
+        return _SCHEMAS[tag].decode(count, reader)
+    except (struct.error, UnicodeDecodeError) as e:
+        raise CodecError("Corrupt data") from e
@@ -0,0 +1,169 @@
+import threading
+import time
+from typing import Dict, Optional, Union
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, endpoint: str, retry_after: float):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(
+            f"Circuit open for {endpoint}, retrying in {retry_after:.1f}s"
+        )
+
+
+class Deadline:
+    """
+    A point in time by which a call, including every request it makes, should
+    finish. Pass the same deadline to several calls to bound them together.
+    """
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def of(cls, deadline: Union["Deadline", float, None]) -> Optional["Deadline"]:
+        """
+        Accept a deadline, a number of seconds from now, or None for no deadline.
+        """
+        if deadline is None or isinstance(deadline, Deadline):
+            return deadline
+        return cls(deadline)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self) -> None:
+        """
+        :raises DeadlineExceeded: if the deadline has passed.
+        """
+        if self.expired:
+            raise DeadlineExceeded("Deadline exceeded")
+
+    def timeout(self, default: Optional[float] = None) -> Optional[float]:
+        """
+        Return the timeout for the next request: the time left, or the default
+        timeout if that is shorter.
+
+        :raises DeadlineExceeded: if the deadline has passed.
+        """
+        self.check()
+        remaining = self.remaining()
+        return remaining if default is None else min(remaining, default)
+
+
+class CircuitBreaker:
+    """
+    Fail fast on an endpoint that keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls raise
+    `CircuitOpenError` without making a request. After `reset_timeout` seconds one
+    trial call is let through (half open): the circuit closes if it succeeds and
+    opens again if it fails.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self, endpoint: str, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def before_call(self) -> bool:
+        """
+        Return True if the call is the trial call of a half open circuit, which must
+        be ended with `record_success`, `record_failure` or `end_trial`.
+
+        :raises CircuitOpenError: if the circuit is open, or half open with a trial
+        call already running.
+        """
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return False
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            retry_after = 0.0
+            if self._opened_at is not None:
+                retry_after = self.reset_timeout - (time.monotonic() - self._opened_at)
+            raise CircuitOpenError(self.endpoint, max(retry_after, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def end_trial(self) -> None:
+        """
+        End a trial call without counting it, e.g. when it was cancelled, so that
+        the next call can be the trial.
+        """
+        with self._lock:
+            self._trial_running = False
+
+    def reset(self) -> None:
+        self.record_success()
+
+
+class CircuitBreakers:
+    """
+    A `CircuitBreaker` per endpoint, created on first use.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    endpoint,
+                    CircuitBreaker(
+                        endpoint, self.failure_threshold, self.reset_timeout
+                    ),
+                )
+        return breaker
+
+    def states(self) -> Dict[str, str]:
+        return {endpoint: breaker.state for endpoint, breaker in self._breakers.items()}
+
+    def reset(self) -> None:
+        for breaker in list(self._breakers.values()):
+            breaker.reset()
@@ -3,18 +3,18 @@
 Unified command-line interface for Easy Equities operations.
 """
 import os
+import sys
 import json
-from typing import Dict, Any
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, is_dataclass
+from typing import Dict, Any, Iterable, List, Tuple
 import argparse
-from dotenv import load_dotenv
-import colorama
 
+from easy_equities_client import constants
 from easy_equities_client.clients import EasyEquitiesClient
 from easy_equities_client.instruments.types import Period
 
-# Initialize colorama for colored output
-colorama.init(autoreset=True)
-
 def print_json(data: Dict[str, Any]) -> None:
     """Pretty print JSON data"""
     print(json.dumps(data, indent=2))
@@ -40,9 +40,11 @@ def show_transactions(client: EasyEquitiesClient, account_id: str) -> None:
     print("\nAccount Transactions:")
     print_json(transactions)
 
-def show_holdings(client: EasyEquitiesClient, account_id: str, include_shares: bool = False) -> None:
+def show_holdings(client: EasyEquitiesClient, account_id: str, include_shares: bool = False, fields: str = None) -> None:
     """Show account holdings"""
-    holdings = client.accounts.holdings(account_id, include_shares)
+    holdings = client.accounts.holdings(
+        account_id, include_shares, fields.split(",") if fields else None
+    )
     print("\nAccount Holdings:")
     print_json(holdings)
 
@@ -52,6 +54,11 @@ def convert_to_float(value: str) -> float:
 
 def show_profit_loss(client: EasyEquitiesClient, account_id: str = None) -> None:
     """Show profit/loss for holdings in all accounts or a specific account"""
+    import colorama
+
+    # Initialize colorama for colored output
+    colorama.init(autoreset=True)
+
     accounts = client.accounts.list()
     
     for account in accounts:
@@ -59,7 +66,9 @@ def show_profit_loss(client: EasyEquitiesClient, account_id: str = None) -> None
         # Go through each holding
         try:
             print(f"\nFetching holdings for {account.name}...")
-            holdings = client.accounts.holdings(account.id)
+            holdings = client.accounts.holdings(
+                account.id, fields=['name', 'purchase_value', 'current_value']
+            )
             print(f"Found {len(holdings)} holdings")
             
             total_profit_loss = 0
@@ -117,6 +126,110 @@ def show_historical_prices(client: EasyEquitiesClient, contract_code: str, perio
     print(f"\nHistorical Prices for {contract_code} ({period.value}):")
     print_json(prices)
 
+BATCH_OPERATIONS = {
+    "accounts": lambda client: client.accounts.list(),
+    "valuations": lambda client, account_id: client.accounts.valuations(account_id),
+    "transactions": lambda client, account_id: client.accounts.transactions(account_id),
+    "holdings": lambda client, account_id, include_shares=False, fields=None: client.accounts.holdings(
+        account_id, include_shares, fields
+    ),
+    "prices": lambda client, contract_code, period="ONE_MONTH": client.instruments.historical_prices(
+        contract_code, Period[period.upper()]
+    ),
+}
+
+def to_json_value(value: Any) -> Any:
+    """Make client results (e.g. Account dataclasses) JSON serializable"""
+    if is_dataclass(value):
+        return asdict(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def read_operations(lines: Iterable[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Read one JSON operation per line, e.g.
+    {"op": "holdings", "account_id": "*"} or {"op": "prices", "contract_code": "EQU.ZA.SYGJP"}.
+    Blank lines and lines starting with # are skipped. Returns the operations and an
+    error record for every line that isn't a JSON object.
+    """
+    operations, errors = [], []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            operation = json.loads(line)
+        except ValueError as e:
+            errors.append({"line": number, "input": line, "error": f"Invalid JSON: {e}"})
+            continue
+        if not isinstance(operation, dict):
+            errors.append({"line": number, "input": line, "error": "Operation must be a JSON object"})
+            continue
+        operations.append(operation)
+    return operations, errors
+
+def expand_operations(
+    client: EasyEquitiesClient, operations: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Replace account_id "*" with one operation per account. If the accounts can't be
+    listed, each such operation is returned as an error instead.
+    """
+    if not any(operation.get("account_id") == "*" for operation in operations):
+        return operations, []
+    try:
+        account_ids = [account.id for account in client.accounts.list()]
+    except Exception as e:
+        account_ids = None
+        error = f"{type(e).__name__}: {e}"
+    expanded, errors = [], []
+    for operation in operations:
+        if operation.get("account_id") != "*":
+            expanded.append(operation)
+        elif account_ids is None:
+            errors.append({**operation, "error": error})
+        else:
+            expanded.extend(
+                {**operation, "account_id": account_id} for account_id in account_ids
+            )
+    return expanded, errors
+
+def run_operation(client: EasyEquitiesClient, operation: Dict[str, Any]) -> Dict[str, Any]:
+    arguments = {key: value for key, value in operation.items() if key != "op"}
+    if operation.get("op") not in BATCH_OPERATIONS:
+        return {**operation, "error": f"Unknown operation {operation.get('op')!r}"}
+    try:
+        result = BATCH_OPERATIONS[operation["op"]](client, **arguments)
+        return {**operation, "result": result}
+    except Exception as e:
+        return {**operation, "error": f"{type(e).__name__}: {e}"}
+
+def write_line(output, line: Dict[str, Any]) -> None:
+    output.write(json.dumps(line, separators=(",", ":"), default=to_json_value))
+    output.write("\n")
+    output.flush()
+
+def run_batch(client: EasyEquitiesClient, source, output, workers: int) -> int:
+    """
+    Run the operations read from source concurrently over one client and write each
+    result to output as a line of JSON as soon as it's ready. Lines that aren't
+    operations, and operations on every account if the accounts can't be listed, are
+    reported first, without stopping the batch. Returns the number of failed
+    operations and invalid lines.
+    """
+    operations, errors = read_operations(source)
+    operations, expand_errors = expand_operations(client, operations)
+    errors += expand_errors
+    for error in errors:
+        write_line(output, error)
+    failures = len(errors)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_operation, client, operation) for operation in operations]
+        for future in as_completed(futures):
+            line = future.result()
+            failures += "error" in line
+            write_line(output, line)
+    return failures
+
 def main():
     parser = argparse.ArgumentParser(description="EasyEquities CLI")
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
@@ -141,6 +254,8 @@ def main():
     holdings_parser.add_argument("--account-id", "-a", required=True, help="Account ID")
     holdings_parser.add_argument("--include-shares", "-s", action="store_true", 
                                help="Include share counts (may be slower)")
+    holdings_parser.add_argument("--fields", "-f",
+                               help="Comma separated holding fields to show, e.g. name,current_value")
                                
     # Profit/Loss
     profit_loss_parser = accounts_subparsers.add_parser("profit-loss", help="Show profit/loss for holdings")
@@ -156,9 +271,45 @@ def main():
     prices_parser.add_argument("--period", "-p", choices=[p.name for p in Period], default="ONE_MONTH",
                              help="Time period for historical data")
 
+    # Batch mode
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="Run many operations concurrently with one login and write NDJSON results",
+        description=(
+            "Read one JSON operation per line, e.g. {\"op\": \"holdings\", \"account_id\": \"*\"}. "
+            f"Operations: {', '.join(BATCH_OPERATIONS)}. Use account_id \"*\" for all accounts."
+        ),
+    )
+    batch_parser.add_argument("input", nargs="?", default="-", help="Operations file (default: stdin)")
+    batch_parser.add_argument("--output", "-o", default="-", help="NDJSON output file (default: stdout)")
+    batch_parser.add_argument("--workers", "-w", type=int, default=8, help="Operations to run at once")
+
+    # Streaming server
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Push holdings, valuations and price changes to local subscribers",
+        description=(
+            "Poll the platform once for every subscriber and stream changes as "
+            "Server-Sent Events (/events) or NDJSON (/stream)."
+        ),
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    serve_parser.add_argument("--port", "-p", type=int, default=8765, help="Port to listen on")
+    serve_parser.add_argument("--account-id", "-a", action="append",
+                              help="Account ID to serve, may be repeated (default: all accounts)")
+    serve_parser.add_argument("--contract-code", "-c", action="append", default=[],
+                              help="Extra instrument whose price to serve, may be repeated")
+    serve_parser.add_argument("--interval", "-i", type=float, default=60.0,
+                              help="Seconds between holdings and valuations refreshes")
+    serve_parser.add_argument("--include-shares", "-s", action="store_true",
+                              help="Include share counts in holdings (may be slower)")
+    serve_parser.add_argument("--allow-origin", action="append", default=[],
+                              help="Web origin allowed to read the streams from a browser, may be repeated")
+
     args = parser.parse_args()
 
     # Load credentials and initialize client
+    from dotenv import load_dotenv
     load_dotenv()
     username = os.getenv("EASYEQUITIES_USERNAME")
     password = os.getenv("EASYEQUITIES_PASSWORD")
@@ -167,8 +318,11 @@ def main():
         print("Error: Please set EASYEQUITIES_USERNAME and EASYEQUITIES_PASSWORD in your .env file")
         exit(1)
 
-    client = EasyEquitiesClient()
-    client.login(username=username, password=password)
+    client = EasyEquitiesClient(
+        os.getenv("EASYEQUITIES_BASE_URL", constants.EASY_EQUITIES_BASE_PLATFORM_URL)
+    )
+    # Logs in on the first request to the platform
+    client.login(username=username, password=password, lazy=True)
 
     if not args.command:
         parser.print_help()
@@ -187,7 +341,7 @@ def main():
         elif args.operation == "transactions":
             show_transactions(client, args.account_id)
         elif args.operation == "holdings":
-            show_holdings(client, args.account_id, args.include_shares)
+            show_holdings(client, args.account_id, args.include_shares, args.fields)
         elif args.operation == "profit-loss":
             show_profit_loss(client, args.account_id)
 
@@ -200,5 +354,29 @@ def main():
         if args.operation == "prices":
             show_historical_prices(client, args.contract_code, args.period)
 
+    elif args.command == "batch":
+        # Only close the files opened here, not stdin or stdout.
+        with ExitStack() as stack:
+            source = sys.stdin if args.input == "-" else stack.enter_context(open(args.input))
+            output = sys.stdout if args.output == "-" else stack.enter_context(open(args.output, "w"))
+            failures = run_batch(client, source, output, args.workers)
+        exit(1 if failures else 0)
+
+    elif args.command == "serve":
+        from easy_equities_client.streaming import StreamServer
+
+        server = StreamServer(
+            client,
+            account_ids=args.account_id,
+            contract_codes=args.contract_code,
+            include_shares=args.include_shares,
+            interval=args.interval,
+            host=args.host,
+            port=args.port,
+            allowed_origins=args.allow_origin,
+        )
+        print(f"Streaming on {server.url}/events and {server.url}/stream", file=sys.stderr)
+        server.serve_forever()
+
 if __name__ == "__main__":
     main()
@@ -5,32 +5,153 @@ import sys
 # Add the project root to Python path BEFORE importing easy_equities_client
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from mcp.server.fastmcp import FastMCP
-from easy_equities_client.clients import EasyEquitiesClient
-from dotenv import load_dotenv
+import asyncio
+import functools
 import logging
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from mcp.server.fastmcp import Context, FastMCP
+from easy_equities_client import constants
+from easy_equities_client.accounts.diff import HoldingsDiffer
+from easy_equities_client.clients import EasyEquitiesClient
+from easy_equities_client.pool import ClientPool
+from easy_equities_client.utils.caching import TTLCache
+from easy_equities_client.utils.resilience import Deadline
+
+pool = None
+# Sessions not in use by a tool, most recently used last
+free_sessions: List[int] = []
+# The account each session last selected
+session_accounts: Dict[int, Optional[str]] = {}
+sessions_available = threading.Condition()
+pool_lock = threading.Lock()
+
+
+def get_pool() -> ClientPool:
+    """Create the session pool from the credentials in .env on first use"""
+    global pool
+    with pool_lock:
+        if pool is None:
+            from dotenv import load_dotenv
+
+            # Load credentials from .env
+            load_dotenv()
+            username = os.getenv("EASYEQUITIES_USERNAME")
+            password = os.getenv("EASYEQUITIES_PASSWORD")
+
+            if not username or not password:
+                raise Exception("Please set EASYEQUITIES_USERNAME and EASYEQUITIES_PASSWORD in your .env file")
+
+            # Each session can only have one account selected at a time, so tools that run
+            # concurrently need separate sessions to fetch different accounts in parallel.
+            # Sessions are logged in lazily, the first time a tool needs them, and the most
+            # recently used free session is reused first, so extra sessions only log in
+            # while tools run concurrently.
+            sessions = int(os.getenv("EASYEQUITIES_MCP_SESSIONS", "4"))
+            base_url = os.getenv("EASYEQUITIES_BASE_URL", constants.EASY_EQUITIES_BASE_PLATFORM_URL)
+            new_pool = ClientPool(
+                client_class=functools.partial(EasyEquitiesClient, base_url=base_url),
+                max_clients=sessions,
+                max_connections=max(10, sessions),
+            )
+            with sessions_available:
+                for session_id in reversed(range(sessions)):
+                    new_pool.add(session_id, username=username, password=password)
+                    free_sessions.append(session_id)
+                    session_accounts[session_id] = None
+            pool = new_pool
+        return pool
 
-# Load credentials from .env
-load_dotenv()
-username = os.getenv("EASYEQUITIES_USERNAME")
-password = os.getenv("EASYEQUITIES_PASSWORD")
 
-if not username or not password:
-    raise Exception("Please set EASYEQUITIES_USERNAME and EASYEQUITIES_PASSWORD in your .env file")
+# Results shared by all tools, in seconds. EASYEQUITIES_MCP_CACHE_TTL overrides every TTL,
+# e.g. 0 to fetch on every call (concurrent calls for the same result still share a fetch).
+CACHE_TTL = os.getenv("EASYEQUITIES_MCP_CACHE_TTL")
 
-client = EasyEquitiesClient()
-client.login(username=username, password=password)
+
+def _ttl(default: float) -> float:
+    return default if CACHE_TTL is None else float(CACHE_TTL)
+
+
+cache = TTLCache(ttl=_ttl(60))
+ACCOUNTS_TTL = _ttl(300)
+TRANSACTIONS_TTL = _ttl(300)
+PRICES_TTL = _ttl(300)
+# Seconds get_account_summary waits for accounts' valuations before returning what it has
+SUMMARY_TIMEOUT = float(os.getenv("EASYEQUITIES_MCP_SUMMARY_TIMEOUT", "10"))
 
 # Create an MCP server
 mcp = FastMCP("EasyEquities")
 
+# Holdings last sent to each MCP session per account, for get_account_holdings_changes.
+# Calls without a session (e.g. from tests) share one differ.
+holdings_differs: "weakref.WeakKeyDictionary[Any, HoldingsDiffer]" = weakref.WeakKeyDictionary()
+shared_holdings_differ = HoldingsDiffer()
+
+
+def holdings_differ_for(ctx: Optional[Context]) -> HoldingsDiffer:
+    try:
+        session = ctx.session if ctx is not None else None
+    except ValueError:
+        # Not called in a request
+        session = None
+    if session is None:
+        return shared_holdings_differ
+    differ = holdings_differs.get(session)
+    if differ is None:
+        differ = holdings_differs[session] = HoldingsDiffer()
+    return differ
+
 logging.basicConfig(level=logging.DEBUG)
 
 
+@contextmanager
+def checkout(account_id: Optional[str] = None):
+    """
+    Borrow a logged in client that no other tool is using, preferably one that already
+    has account_id selected so that it doesn't have to switch accounts
+    """
+    clients = get_pool()
+    with sessions_available:
+        sessions_available.wait_for(lambda: free_sessions)
+        session_id = free_sessions[-1]
+        if account_id is not None:
+            session_id = next(
+                (s for s in reversed(free_sessions) if session_accounts[s] == account_id),
+                session_id,
+            )
+        free_sessions.remove(session_id)
+    try:
+        yield clients.get(session_id)
+    finally:
+        with sessions_available:
+            if account_id is not None:
+                session_accounts[session_id] = account_id
+            free_sessions.append(session_id)
+            sessions_available.notify()
+
+
+def _call(method: str, *args):
+    # Account methods take the account ID first.
+    account_id = args[0] if args and method.startswith("accounts.") else None
+    with checkout(account_id) as client:
+        sub_client, name = method.split(".")
+        return getattr(getattr(client, sub_client), name)(*args)
+
+
+async def cached(key: tuple, method: str, *args, ttl: float = None):
+    """Return a cached result, or fetch it in a worker thread without blocking other tools"""
+    return await asyncio.to_thread(
+        cache.get_or_load, key, lambda: _call(method, *args), ttl
+    )
+
+
 @mcp.tool(description="List all Easy Equities accounts with correct attribute names")
-def list_accounts() -> list:
+async def list_accounts() -> list:
     logging.info("list_accounts called")
-    accounts = client.accounts.list()
+    accounts = await cached(("accounts",), "accounts.list", ttl=ACCOUNTS_TTL)
     return [
         {
             "account_id": account.id,
@@ -42,37 +163,66 @@ def list_accounts() -> list:
 
 
 @mcp.tool(description="Get valuations for a specific Easy Equities account")
-def get_account_valuations(account_id: str) -> dict:
+async def get_account_valuations(account_id: str) -> dict:
     logging.info(f"get_account_valuations called with account_id={account_id}")
     try:
-        return client.accounts.valuations(account_id)
+        return await cached(("valuations", account_id), "accounts.valuations", account_id)
     except Exception as e:
         logging.error(f"Error getting valuations for account {account_id}: {str(e)}")
         return {"error": str(e)}
 
 
 @mcp.tool(description="Get transaction history for a specific Easy Equities account")
-def get_account_transactions(account_id: str) -> dict:
+async def get_account_transactions(account_id: str) -> dict:
     logging.info(f"get_account_transactions called with account_id={account_id}")
     try:
-        return client.accounts.transactions(account_id)
+        return await cached(
+            ("transactions", account_id), "accounts.transactions", account_id, ttl=TRANSACTIONS_TTL
+        )
     except Exception as e:
         logging.error(f"Error getting transactions for account {account_id}: {str(e)}")
         return {"error": str(e)}
 
 
-@mcp.tool(description="Get current holdings for a specific Easy Equities account")
-def get_account_holdings(account_id: str, include_shares: bool = False) -> dict:
-    logging.info(f"get_account_holdings called with account_id={account_id}, include_shares={include_shares}")
+@mcp.tool(description="Get current holdings for a specific Easy Equities account. Pass fields (e.g. [\"name\", \"current_value\"]) to only get those fields; share counts (\"shares\") need an extra request per holding")
+async def get_account_holdings(account_id: str, include_shares: bool = False, fields: Optional[List[str]] = None) -> dict:
+    logging.info(f"get_account_holdings called with account_id={account_id}, include_shares={include_shares}, fields={fields}")
     try:
-        return client.accounts.holdings(account_id, include_shares)
+        if fields is None:
+            return await cached(
+                ("holdings", account_id, include_shares), "accounts.holdings", account_id, include_shares
+            )
+        return await cached(
+            ("holdings", account_id, include_shares, tuple(fields)),
+            "accounts.holdings",
+            account_id,
+            include_shares,
+            fields,
+        )
     except Exception as e:
         logging.error(f"Error getting holdings for account {account_id}: {str(e)}")
         return {"error": str(e)}
 
 
+@mcp.tool(description="Get the holdings added, removed or changed in an Easy Equities account since the previous call for that account and include_shares")
+async def get_account_holdings_changes(
+    account_id: str, include_shares: bool = False, ctx: Optional[Context] = None
+) -> dict:
+    logging.info(f"get_account_holdings_changes called with account_id={account_id}, include_shares={include_shares}")
+    try:
+        holdings = await cached(
+            ("holdings", account_id, include_shares), "accounts.holdings", account_id, include_shares
+        )
+        # Holdings with and without share counts differ in every holding.
+        diff = holdings_differ_for(ctx).update((account_id, include_shares), holdings)
+        return {"has_changes": bool(diff), **diff.to_dict()}
+    except Exception as e:
+        logging.error(f"Error getting holdings changes for account {account_id}: {str(e)}")
+        return {"error": str(e)}
+
+
 @mcp.tool(description="Get historical prices for an instrument. Available periods: ONE_DAY, ONE_WEEK, ONE_MONTH, THREE_MONTHS, SIX_MONTHS, ONE_YEAR, TWO_YEARS, FIVE_YEARS")
-def get_instrument_historical_prices(contract_code: str, period: str = "ONE_MONTH") -> dict:
+async def get_instrument_historical_prices(contract_code: str, period: str = "ONE_MONTH") -> dict:
     logging.info(f"get_instrument_historical_prices called with contract_code={contract_code}, period={period}")
     try:
         from easy_equities_client.instruments.types import Period
@@ -81,49 +231,76 @@ def get_instrument_historical_prices(contract_code: str, period: str = "ONE_MONT
         if not hasattr(Period, period_upper):
             available_periods = [p.name for p in Period]
             return {"error": f"Invalid period '{period}'. Available periods: {available_periods}"}
-        
+
         period_enum = Period[period_upper]
-        return client.instruments.historical_prices(contract_code, period_enum)
+        return await cached(
+            ("prices", contract_code, period_enum.value),
+            "instruments.historical_prices",
+            contract_code,
+            period_enum,
+            ttl=PRICES_TTL,
+        )
     except Exception as e:
         logging.error(f"Error getting historical prices for {contract_code}: {str(e)}")
         return {"error": str(e)}
 
 
+async def _account_summary(account, deadline: Deadline) -> dict:
+    account_info = {
+        "account_id": account.id,
+        "account_name": account.name,
+        "trading_currency_id": account.trading_currency_id
+    }
+
+    # Try to get basic valuation info
+    try:
+        # A slow account only marks its own summary as failed. The fetch has no deadline
+        # of its own, so it carries on in the background and fills the cache for the
+        # next call.
+        valuations = await asyncio.wait_for(
+            cached(("valuations", account.id), "accounts.valuations", account.id),
+            timeout=deadline.remaining(),
+        )
+        if isinstance(valuations, dict) and 'totalValue' in valuations:
+            account_info["total_value"] = valuations.get('totalValue')
+            account_info["currency"] = valuations.get('currency', 'Unknown')
+    except asyncio.TimeoutError:
+        logging.warning(f"Timed out getting valuations for account {account.id}")
+        account_info["valuation_error"] = "Deadline exceeded"
+    except Exception as e:
+        logging.warning(f"Could not get valuations for account {account.id}: {str(e)}")
+        account_info["valuation_error"] = str(e) or type(e).__name__
+    return account_info
+
+
 @mcp.tool()
-def get_account_summary() -> dict:
-    """Get a summary of all accounts with basic information"""
-    logging.info("get_account_summary called")
+async def get_account_summary(timeout: Optional[float] = None) -> dict:
+    """Get a summary of all accounts with basic information, within timeout seconds (default 10). Accounts that couldn't be valued in time have a valuation_error"""
+    logging.info(f"get_account_summary called with timeout={timeout}")
+    deadline = Deadline(SUMMARY_TIMEOUT if timeout is None else timeout)
     try:
-        accounts = client.accounts.list()
-        summary = {
+        accounts = await asyncio.wait_for(
+            cached(("accounts",), "accounts.list", ttl=ACCOUNTS_TTL),
+            timeout=deadline.remaining(),
+        )
+        summaries = list(
+            await asyncio.gather(*[_account_summary(account, deadline) for account in accounts])
+        )
+        return {
             "total_accounts": len(accounts),
-            "accounts": []
+            "partial": any("valuation_error" in summary for summary in summaries),
+            "accounts": summaries,
         }
-        
-        for account in accounts:
-            account_info = {
-                "account_id": account.id,
-                "account_name": account.name,
-                "trading_currency_id": account.trading_currency_id
-            }
-            
-            # Try to get basic valuation info
-            try:
-                valuations = client.accounts.valuations(account.id)
-                if isinstance(valuations, dict) and 'totalValue' in valuations:
-                    account_info["total_value"] = valuations.get('totalValue')
-                    account_info["currency"] = valuations.get('currency', 'Unknown')
-            except Exception as e:
-                logging.warning(f"Could not get valuations for account {account.id}: {str(e)}")
-                account_info["valuation_error"] = str(e)
-            
-            summary["accounts"].append(account_info)
-        
-        return summary
+    except asyncio.TimeoutError:
+        logging.error("Timed out getting the accounts for the account summary")
+        return {"error": "Deadline exceeded"}
     except Exception as e:
         logging.error(f"Error getting account summary: {str(e)}")
         return {"error": str(e)}
 
 
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    # stdio by default, or "sse"/"streamable-http" on EASYEQUITIES_MCP_HOST:EASYEQUITIES_MCP_PORT
+    mcp.settings.host = os.getenv("EASYEQUITIES_MCP_HOST", mcp.settings.host)
+    mcp.settings.port = int(os.getenv("EASYEQUITIES_MCP_PORT", mcp.settings.port))
+    mcp.run(transport=os.getenv("EASYEQUITIES_MCP_TRANSPORT", "stdio"))
@@ -0,0 +1,38 @@
+from easy_equities_client.clients import PlatformClient
+from easy_equities_client.instruments.index import Instrument
+from easy_equities_client.instruments.types import Period
+
+
+class Response:
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'Prices': []}
+
+
+def test_lazy_login_waits_for_a_request(monkeypatch):
+    client = PlatformClient("https://platform.example")
+    requests = []
+    monkeypatch.setattr(
+        client, "_login", lambda username, password: requests.append("login")
+    )
+    monkeypatch.setattr(
+        client.instruments,
+        "_request",
+        lambda method, path, *args, **kwargs: requests.append(path) or Response(),
+    )
+    instrument = Instrument(contract_code="EQU.ZA.A", name="A")
+    client.instrument_index.add(instrument)
+    client.login("user", "password", lazy=True)
+
+    assert client.instruments.lookup("EQU.ZA.A") == instrument
+    assert requests == []
+
+    client.instruments.historical_prices("EQU.ZA.A", Period.ONE_MONTH)
+    client.instruments.historical_prices("EQU.ZA.A", Period.ONE_MONTH)
+    assert requests[0] == "login"
+    assert requests.count("login") == 1
+    assert len(requests) == 3
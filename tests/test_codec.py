@@ -0,0 +1,265 @@
+import math
+
+import pytest
+
+from easy_equities_client.accounts.types import Account
+from easy_equities_client.utils.codec import MAGIC, CodecError, dumps, loads
+
+# Encoded with VERSION 2. The holdings were encoded while `Holding` still had
+# `average_cost` and `exposure` fields, before `error` and `stale`.
+HOLDINGS_WITH_REMOVED_FIELDS = bytes.fromhex(
+    "4545430202020000000f00000000900000006e616d6500636f6e74726163745f636f64650070"
+    "757263686173655f76616c75650063757272656e745f76616c75650063757272656e745f7072"
+    "69636500696d6700766965775f75726c006973696e007368617265730077686f6c655f736861"
+    "726573006673725f73686172657300617665726167655f636f7374006578706f737572650065"
+    "72726f72007374616c650f000000001d00000073007300730073007300730073007300730073"
+    "0073007300730073007300080000000121000001080000020000000003000000410042000000"
+    "0000000000000000000000000000000000000000000000000000000000000000000000000000"
+    "00000000000000000000000000000000000000000000010000000003000000312e3500000000"
+    "00000000000000000000000000000100000000060000005231302e3030000000000000000000"
+    "010000000004000000626f6f6d000000000000000000"
+)
+
+ACCOUNTS = bytes.fromhex(
+    "45454302010100000003000000001b0000006964006e616d650074726164696e675f63757272"
+    "656e63795f696403000000000500000073007300730107000000010000000001000000310100"
+    "000000030000005a415201000000000100000032"
+)
+
+TRANSACTIONS = bytes.fromhex(
+    "4545430203010000000800000000540000005472616e73616374696f6e496400446562697443"
+    "726564697400436f6d6d656e74005472616e73616374696f6e44617465004c6f674964004163"
+    "74696f6e496400416374696f6e00436f6e7472616374436f646508000000000f000000710064"
+    "00730073007100710073007301ff000000080000000100000000000000080000000000000000"
+    "0025c0010000000006000000426f7567687401000000000a000000323032312d30362d323508"
+    "0000000200000000000000080000000300000000000000010000000003000000427579010000"
+    "00000c0000004551552e5a412e5354583430"
+)
+
+GENERIC = bytes.fromhex(
+    "45454302000000000003000000001b0000006100c3a900313138303539313632303731373431"
+    "3133303334323408000000010000000000000008000000000000000000044024000000170000"
+    "000000000066000000030000000400000000000000010000001500000028000000"
+)
+
+
+def assert_same(decoded, expected):
+    """
+    Assert that two values are equal and have the same types, treating NaN as equal
+    to NaN.
+    """
+    assert type(decoded) is type(expected)
+    if isinstance(expected, float) and math.isnan(expected):
+        assert math.isnan(decoded)
+    elif isinstance(expected, dict):
+        assert list(decoded) == list(expected)
+        for key in expected:
+            assert_same(decoded[key], expected[key])
+    elif isinstance(expected, list):
+        assert len(decoded) == len(expected)
+        for decoded_item, expected_item in zip(decoded, expected):
+            assert_same(decoded_item, expected_item)
+    else:
+        assert decoded == expected
+
+
+def round_trip(value, schema=None):
+    decoded = loads(dumps(value, schema))
+    assert_same(decoded, value)
+    return decoded
+
+
+def transaction(transaction_id=1, debit_credit=-100.5, **overrides):
+    return {
+        'TransactionId': transaction_id,
+        'DebitCredit': debit_credit,
+        'Comment': "Bought Satrix 40",
+        'TransactionDate': "2021-06-25T00:00:00",
+        'LogId': 2,
+        'ActionId': 3,
+        'Action': "Buy",
+        'ContractCode': "EQU.ZA.STX40",
+        **overrides,
+    }
+
+
+def test_accounts():
+    accounts = [
+        Account(id="1", name="EasyEquities ZAR", trading_currency_id="2"),
+        Account(id="2", name="TFSA", trading_currency_id="2"),
+    ]
+    decoded = round_trip(accounts)
+    assert all(isinstance(account, Account) for account in decoded)
+
+
+def test_holdings_with_different_fields():
+    holdings = [
+        {'name': "Satrix 40", 'contract_code': "EQU.ZA.STX40", 'shares': "1.5"},
+        {'name': "Sygnia Itrix", 'contract_code': "EQU.ZA.SYGJP"},
+        {'name': "Naspers", 'error': "Deadline exceeded"},
+    ]
+    round_trip(holdings)
+    round_trip(holdings, schema="holdings")
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        [None],
+        {'a': None, 'b': [None, {'c': None}]},
+        [{'name': None}],
+        [transaction(Comment=None)],
+    ],
+)
+def test_none(value):
+    round_trip(value)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        math.nan,
+        [math.nan, math.inf, -math.inf, -0.0],
+        {'TopSummary': {'AccountValue': math.nan}},
+        [transaction(debit_credit=math.nan), transaction(debit_credit=1.0)],
+    ],
+)
+def test_nan_and_infinity(value):
+    round_trip(value)
+
+
+def test_negative_zero_keeps_its_sign():
+    (decoded,) = round_trip([transaction(debit_credit=-0.0)])
+    assert math.copysign(1.0, decoded['DebitCredit']) == -1.0
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        [],
+        [[]],
+        {'a': [], 'b': {}},
+        [{}],
+        [{}, {}],
+        [{'name': ""}],
+        [{'name': ""}, {'name': ""}],
+        [{'LabelValue': []}],
+        "",
+    ],
+)
+def test_empty_values(value):
+    round_trip(value)
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "Société Générale",
+        "日本株 ETF",
+        "Rocket 🚀",
+        "Tab\tand newline\n",
+        "Embedded\0NUL",
+        "\0",
+    ],
+)
+def test_unicode(name):
+    round_trip([{'name': name, 'contract_code': "EQU.ZA.X"}, {'name': "Plain"}])
+    round_trip({name: [name, {'Label': name, 'Value': name}]})
+
+
+def test_nested_dicts():
+    valuation = {
+        'TopSummary': {
+            'AccountValue': 1234.56,
+            'AccountCurrency': "ZAR",
+            'PeriodMovements': [
+                {'Label': "Day", 'Value': "R1.00"},
+                {'Label': "Week", 'Value': "R-2.00"},
+            ],
+        },
+        'NetInterestOnCashItems': [{'Label': "Interest", 'Value': "R0.10"}],
+        'Nested': {'a': {'b': {'c': {'d': [1, 2.5, True, False, None, "e"]}}}},
+    }
+    round_trip(valuation)
+
+
+@pytest.mark.parametrize(
+    "number",
+    [2**63 - 1, -(2**63), 2**63, -(2**63) - 1, 10**30, -(10**30)],
+)
+def test_big_ints(number):
+    round_trip(number)
+    round_trip({'value': [number, 1]})
+    round_trip([transaction(transaction_id=number), transaction()])
+
+
+@pytest.mark.parametrize(
+    "records",
+    [
+        # An int among floats
+        [transaction(debit_credit=1), transaction(debit_credit=1.5)],
+        # A bool in an int column
+        [transaction(transaction_id=True), transaction()],
+        # A float in an int column
+        [transaction(transaction_id=1.0)],
+        # A number in a str column
+        [{'name': "Satrix 40"}, {'name': 40}],
+        # A field that isn't in the field table
+        [{'name': "Satrix 40", 'unknown': "x"}],
+        # Records of different kinds
+        [transaction(), {'name': "Satrix 40"}],
+        [1, "1", 1.0, True, None],
+    ],
+)
+def test_mixed_type_columns(records):
+    round_trip(records)
+    round_trip(records, schema="transactions")
+
+
+def test_bools_stay_bools():
+    decoded = round_trip([True, False, 1, 0])
+    assert [type(value) for value in decoded] == [bool, bool, int, int]
+
+
+def test_unsupported_values():
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
+    with pytest.raises(TypeError):
+        dumps({1: "int key"})
+
+
+@pytest.mark.parametrize("data", [b"", b"EEC", b"XYZ\x01\x00\x00\x00\x00\x00"])
+def test_invalid_data(data):
+    with pytest.raises(CodecError):
+        loads(data)
+
+
+def test_truncated_data():
+    data = dumps([transaction(), transaction(2)])
+    with pytest.raises(CodecError):
+        loads(data[:-3])
+
+
+def test_decodes_fields_removed_since_encoding():
+    assert loads(HOLDINGS_WITH_REMOVED_FIELDS) == [
+        {'name': "A", 'shares': "1.5", 'error': "boom"},
+        {'name': "B", 'average_cost': "R10.00"},
+    ]
+
+
+def test_decodes_fixed_data():
+    assert loads(ACCOUNTS) == [Account(id="1", name="ZAR", trading_currency_id="2")]
+    assert loads(TRANSACTIONS) == [
+        transaction(
+            debit_credit=-10.5,
+            Comment="Bought",
+            TransactionDate="2021-06-25",
+        )
+    ]
+    assert loads(GENERIC) == {'a': [1, 2.5, None, True, "é", 2**70]}
+
+
+def test_rejects_data_without_field_tables():
+    with pytest.raises(CodecError, match="version 1"):
+        loads(MAGIC + bytes([1]) + ACCOUNTS[len(MAGIC) + 1 :])
@@ -0,0 +1,59 @@
+import pytest
+
+from easy_equities_client.accounts.detail_parsers import HoldingDetailParser
+
+# Shaped like a holding detail page: each label is followed by its value in the
+# next element at the same depth, among rows without labels.
+PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Satrix 40</title><meta charset="utf-8"></head>
+<body>
+  <div class="holding-detail">
+    <div class="row"><div class="label">Purchase Value</div><div>R1 000.00</div></div>
+    <div class="row">
+      <div class="label">
+        #Shares
+      </div>
+      <div class="value"><span>12</span></div>
+    </div>
+    <img src="logo.png">
+    <div class="row"><div class="label">Current Value</div><div>R1 234.56</div></div>
+    <div class="row">
+      <div class="label">#FSR</div>
+      <br>
+      <div class="value">.3456</div>
+    </div>
+  </div>
+</body>
+</html>
+"""
+
+
+def test_matches_beautifulsoup_fallback():
+    parser = HoldingDetailParser(PAGE.encode())
+
+    assert parser._tokenize() == parser._soup_scan()
+    assert parser._tokenize() == {'whole_shares': "12", 'fsr_shares': ".3456"}
+
+
+def test_extract_detail():
+    assert HoldingDetailParser(PAGE).extract_detail() == {
+        'whole_shares': "12",
+        'fsr_shares': ".3456",
+        'shares': "12.3456",
+    }
+
+
+def test_falls_back_to_beautifulsoup_for_stray_end_tags():
+    # The stray end tag closes the label early for the tokenizer, which then loses
+    # track of the value.
+    page = PAGE.replace("#FSR</div>", "#FSR</span></div>")
+    parser = HoldingDetailParser(page)
+    assert 'fsr_shares' not in parser._tokenize()
+
+    assert parser.extract_detail()['shares'] == "12.3456"
+
+
+def test_missing_share_counts():
+    with pytest.raises(ValueError, match="fsr_shares"):
+        HoldingDetailParser(PAGE.replace("#FSR", "Other")).extract_detail()
@@ -0,0 +1,93 @@
+from easy_equities_client.accounts.diff import (
+    HoldingsDiffer,
+    HoldingsSnapshot,
+    diff_holdings,
+    holding_key,
+)
+
+
+def holding(name, current_value="R100.00", **fields):
+    return {
+        'name': name,
+        'contract_code': f"EQU.ZA.{name.upper()}",
+        'current_value': current_value,
+        **fields,
+    }
+
+
+def test_first_update_adds_every_holding():
+    differ = HoldingsDiffer()
+    holdings = [holding("a"), holding("b")]
+
+    diff = differ.update("1", holdings)
+
+    assert diff.added == holdings
+    assert not diff.removed and not diff.changed
+
+
+def test_reports_added_removed_and_changed_holdings():
+    differ = HoldingsDiffer()
+    differ.update("1", [holding("a"), holding("b")])
+
+    diff = differ.update("1", [holding("a", "R110.00"), holding("c")])
+
+    assert diff.added == [holding("c")]
+    assert diff.removed == [holding("b")]
+    assert diff.changed == [holding("a", "R110.00")]
+    assert diff.to_dict() == {
+        'added': diff.added,
+        'removed': diff.removed,
+        'changed': diff.changed,
+    }
+
+
+def test_unchanged_holdings_in_another_order_have_no_changes():
+    differ = HoldingsDiffer()
+    differ.update("1", [holding("a"), holding("b")])
+
+    diff = differ.update("1", [holding("b"), holding("a")])
+
+    assert not diff
+
+
+def test_keys_are_independent():
+    differ = HoldingsDiffer()
+    differ.update(("1", False), [holding("a")])
+    differ.update(("1", True), [holding("a", shares="2")])
+
+    assert not differ.update(("1", False), [holding("a")])
+    assert not differ.update(("1", True), [holding("a", shares="2")])
+    assert differ.update("2", [holding("a")]).added == [holding("a")]
+
+
+def test_reset():
+    differ = HoldingsDiffer()
+    differ.update("1", [holding("a")])
+    differ.update("2", [holding("a")])
+
+    differ.reset("1")
+    assert differ.snapshot("1") is None
+    assert differ.snapshot("2") is not None
+
+    differ.reset()
+    assert differ.snapshot("2") is None
+
+
+def test_holding_key_fallbacks():
+    assert holding_key({'contract_code': "EQU.ZA.A", 'isin': "ZA1"}) == "EQU.ZA.A"
+    assert holding_key({'isin': "ZA1", 'name': "A"}) == "ZA1"
+    assert holding_key({'view_url': "/detail?IsinCode=ZA1", 'name': "A"}) == (
+        "/detail?IsinCode=ZA1"
+    )
+    assert holding_key({'name': "A", 'current_value': "R1"}) == "A"
+
+
+def test_holdings_without_key_fields_are_keyed_by_digest():
+    old = HoldingsSnapshot.from_holdings([{'current_value': "R1"}])
+    new = HoldingsSnapshot.from_holdings([{'current_value': "R2"}])
+
+    diff = diff_holdings(old, new)
+
+    assert diff.added == [{'current_value': "R2"}]
+    assert diff.removed == [{'current_value': "R1"}]
+    assert not diff.changed
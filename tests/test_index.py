@@ -0,0 +1,61 @@
+from easy_equities_client.instruments.index import Instrument, InstrumentIndex
+
+
+def test_updates_instrument_with_same_contract_code():
+    index = InstrumentIndex()
+    index.add(Instrument(contract_code="EQU.ZA.STX40", name="Satrix 40"))
+    index.add(Instrument(contract_code="EQU.ZA.STX40", isin="ZAE000027108"))
+
+    assert len(index) == 1
+    instrument = index.get("ZAE000027108")
+    assert instrument is index.get("Satrix 40")
+    assert instrument.contract_code == "EQU.ZA.STX40"
+
+
+def test_merges_instrument_seen_without_contract_code():
+    index = InstrumentIndex()
+    index.add(Instrument(contract_code="", isin="ZAE000027108", img="logo.png"))
+    index.add(Instrument(contract_code="EQU.ZA.STX40", name="Satrix 40"))
+    index.add(Instrument(contract_code="EQU.ZA.STX40", isin="ZAE000027108"))
+
+    assert len(index) == 1
+    instrument = index.get("EQU.ZA.STX40")
+    assert instrument is index.get("ZAE000027108")
+    assert instrument.name == "Satrix 40"
+    assert instrument.img == "logo.png"
+
+
+def test_moves_isin_between_contract_codes():
+    index = InstrumentIndex()
+    index.add(Instrument(contract_code="EQU.ZA.OLD", isin="ZAE000027108", name="Old"))
+    index.add(Instrument(contract_code="EQU.ZA.NEW", name="New"))
+    index.add(Instrument(contract_code="EQU.ZA.NEW", isin="ZAE000027108"))
+
+    assert len(index) == 2
+    assert index.get("ZAE000027108").contract_code == "EQU.ZA.NEW"
+    old = index.get("EQU.ZA.OLD")
+    assert old.isin == ""
+    assert old is index.get("Old")
+
+
+def test_keeps_name_of_other_instrument():
+    index = InstrumentIndex()
+    index.add(Instrument(contract_code="EQU.ZA.A", name="Same name"))
+    index.add(Instrument(contract_code="EQU.ZA.B", name="Same name"))
+    index.add(Instrument(contract_code="EQU.ZA.A", name="Renamed"))
+
+    assert index.get("Same name").contract_code == "EQU.ZA.B"
+    assert index.get("Renamed").contract_code == "EQU.ZA.A"
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "instruments.json")
+    index = InstrumentIndex(path)
+    index.add_holdings(
+        [{'contract_code': "EQU.ZA.STX40", 'isin': "ZAE000027108", 'name': "Satrix 40"}]
+    )
+    index.save()
+
+    loaded = InstrumentIndex(path)
+    assert len(loaded) == 1
+    assert loaded.get("satrix 40").isin == "ZAE000027108"
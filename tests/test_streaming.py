@@ -0,0 +1,142 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from easy_equities_client.scheduler import Snapshot
+from easy_equities_client.streaming import StreamHub, StreamServer, _StreamHandler
+
+
+def test_sse_frame():
+    event = {'id': 3, 'type': 'price', 'contract_code': "EQU.ZA.A", 'label': "a\nb"}
+
+    frame = _StreamHandler._sse(event)
+
+    assert frame.endswith(b"\n\n")
+    lines = frame.decode().split("\n")
+    assert lines[:2] == ["id: 3", "event: price"]
+    assert lines[2].startswith("data: ")
+    # Newlines in values are escaped, so the data is one line.
+    assert json.loads(lines[2][len("data: ") :]) == event
+    assert lines[3:] == ["", ""]
+
+
+def test_sse_keepalive_is_a_comment():
+    assert _StreamHandler._sse(None) == b": keepalive\n\n"
+
+
+def test_ndjson_frame():
+    event = {'id': 1, 'type': 'holdings', 'added': [{'name': "Société"}]}
+
+    frame = _StreamHandler._ndjson(event)
+
+    assert frame.endswith(b"\n") and frame.count(b"\n") == 1
+    assert json.loads(frame) == event
+    assert json.loads(_StreamHandler._ndjson(None)) == {'type': 'heartbeat'}
+
+
+def test_hub_numbers_and_filters_events():
+    hub = StreamHub()
+    prices = hub.subscribe(["price"], lambda: [{'type': 'price', 'price': 1.0}])
+    everything = hub.subscribe()
+
+    hub.publish({'type': 'holdings'})
+    hub.publish({'type': 'price', 'price': 2.0})
+
+    initial, published = prices.events.get_nowait(), prices.events.get_nowait()
+    assert (initial['id'], initial['price']) == (1, 1.0)
+    assert (published['id'], published['price']) == (3, 2.0)
+    assert prices.events.empty()
+    assert [everything.events.get_nowait()['type'] for _ in range(2)] == [
+        'holdings',
+        'price',
+    ]
+
+
+def test_hub_disconnects_subscribers_that_fall_behind():
+    hub = StreamHub(max_queue=2)
+    slow = hub.subscribe()
+
+    for _ in range(3):
+        hub.publish({'type': 'price'})
+
+    assert slow.closed
+    assert hub.subscribers == 0
+    events = [slow.events.get_nowait() for _ in range(slow.events.qsize())]
+    assert events[-1] is None
+
+
+@pytest.fixture
+def server():
+    server = StreamServer(
+        client=None,
+        account_ids=["1"],
+        watch_held_prices=False,
+        port=0,
+        heartbeat=0.05,
+        allowed_origins=["http://localhost:3000"],
+    )
+    server.start()
+    server._on_snapshot(
+        ("holdings", "1"), Snapshot(value=[{'name': "A"}], updated_at=0.0)
+    )
+    yield server
+    server.stop()
+
+
+def get(server, path, headers=None):
+    request = urllib.request.Request(server.url + path, headers=headers or {})
+    return urllib.request.urlopen(request, timeout=5)
+
+
+def test_snapshot(server):
+    with get(server, "/snapshot") as response:
+        events = json.loads(response.read())
+        assert response.headers["Access-Control-Allow-Origin"] is None
+
+    assert [(e['type'], e['account_id'], e['added']) for e in events] == [
+        ('holdings', "1", [{'name': "A"}])
+    ]
+
+
+def test_ndjson_stream(server):
+    with get(server, "/stream?types=holdings") as response:
+        assert response.headers["Content-Type"] == "application/x-ndjson"
+        first = json.loads(response.readline())
+        server._on_snapshot(
+            ("holdings", "1"), Snapshot(value=[{'name': "B"}], updated_at=0.0)
+        )
+        lines = [json.loads(response.readline()) for _ in range(3)]
+
+    assert first['added'] == [{'name': "A"}]
+    change = next(line for line in lines if line['type'] == 'holdings')
+    assert change['added'] == [{'name': "B"}]
+    assert change['removed'] == [{'name': "A"}]
+    assert change['id'] > first['id']
+
+
+def test_sse_stream(server):
+    headers = {'Origin': "http://localhost:3000"}
+    with get(server, "/events", headers) as response:
+        assert response.headers["Content-Type"] == "text/event-stream"
+        assert response.headers["Access-Control-Allow-Origin"] == headers['Origin']
+        frame = [response.readline() for _ in range(4)]
+        keepalive = [response.readline() for _ in range(2)]
+
+    assert frame[1] == b"event: holdings\n"
+    assert json.loads(frame[2][len(b"data: ") :])['added'] == [{'name': "A"}]
+    assert frame[3] == b"\n"
+    assert keepalive == [b": keepalive\n", b"\n"]
+
+
+def test_rejects_other_hosts(server):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(server, "/snapshot", {'Host': "attacker.example"})
+    assert error.value.code == 403
+
+
+def test_rejects_unknown_event_types(server):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(server, "/stream?types=secrets")
+    assert error.value.code == 400